@@ -24,7 +24,7 @@ def _append_unrar(filename="UnRAR64.dll"):
     :param filename: 文件名，默认UnRAR64.dll
     :return:
     """
-    dll_path = "\\".join((sys.path[0], filename))
+    dll_path = path.join(sys.path[0], filename)
     environ["UNRAR_LIB_PATH"] = dll_path
     # print("UNRAR_LIB_PATH:", environ["UNRAR_LIB_PATH"])
 
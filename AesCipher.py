@@ -0,0 +1,128 @@
+# %% 生成AES查找表
+def _xtime(a: int) -> int:
+    """
+    GF(2^8)上乘以2\n
+    :param a: 字节
+    :return: 乘积
+    """
+    a = a << 1
+    return a ^ 0x11B if a & 0x100 else a
+
+
+def _multiply(a: int, b: int) -> int:
+    """
+    GF(2^8)上的乘法\n
+    :param a: 字节
+    :param b: 字节
+    :return: 乘积
+    """
+    result = 0
+    while b:
+        if b & 1:
+            result = result ^ a
+        a = _xtime(a)
+        b = b >> 1
+    return result
+
+
+def _make_sbox() -> ([int], [int]):
+    """
+    生成S盒与逆S盒\n
+    :return: (S盒, 逆S盒)
+    """
+    sbox = [0x63] * 256
+    p = q = 1
+    while True:
+        # p乘以3，q除以3，q始终是p的乘法逆元
+        p = p ^ ((p << 1) & 0xFF) ^ (0x1B if p & 0x80 else 0)
+        q = q ^ (q << 1)
+        q = q ^ (q << 2)
+        q = q ^ (q << 4)
+        q = q & 0xFF
+        if q & 0x80:
+            q = q ^ 0x09
+        x = q
+        for shift in range(1, 5):
+            x = x ^ (((q << shift) | (q >> (8 - shift))) & 0xFF)
+        sbox[p] = x ^ 0x63
+        if p == 1:
+            break
+    inv_sbox = [0] * 256
+    for i, x in enumerate(sbox):
+        inv_sbox[x] = i
+    return sbox, inv_sbox
+
+
+# %% 声明全局变量
+SBOX, INV_SBOX = _make_sbox()
+MUL9 = [_multiply(i, 9) for i in range(256)]
+MUL11 = [_multiply(i, 11) for i in range(256)]
+MUL13 = [_multiply(i, 13) for i in range(256)]
+MUL14 = [_multiply(i, 14) for i in range(256)]
+# AES分组长度
+BLOCK_SIZE = 16
+
+
+# %% 纯Python的AES解密，只用于校验少量字节，不用于解压大文件
+class AesDecryptor(object):
+    """
+    AES-128/192/256解密类
+    """
+
+    def __init__(self, key: bytes):
+        """
+        构造方法，展开轮密钥\n
+        :param key: 16、24或32字节的密钥
+        """
+        key_words = len(key) // 4
+        self.rounds = key_words + 6
+        words = [list(key[i:i + 4]) for i in range(0, len(key), 4)]
+        rcon = 1
+        for i in range(key_words, 4 * (self.rounds + 1)):
+            temp = list(words[i - 1])
+            if i % key_words == 0:
+                temp = [SBOX[b] for b in temp[1:] + temp[:1]]
+                temp[0] = temp[0] ^ rcon
+                rcon = _xtime(rcon)
+            elif key_words > 6 and i % key_words == 4:
+                temp = [SBOX[b] for b in temp]
+            words.append([words[i - key_words][j] ^ temp[j] for j in range(4)])
+        self.round_keys = [sum(words[4 * r:4 * r + 4], []) for r in range(self.rounds + 1)]
+
+    def decrypt_block(self, block: bytes) -> bytes:
+        """
+        解密一个16字节的分组\n
+        :param block: 密文分组
+        :return: 明文分组
+        """
+        state = [b ^ k for b, k in zip(block, self.round_keys[self.rounds])]
+        for r in range(self.rounds - 1, -1, -1):
+            # 逆行移位与逆字节代换，状态按列存储，第row行向右移row位
+            state = [INV_SBOX[state[((column - row) % 4) * 4 + row]] for column in range(4) for row in range(4)]
+            state = [b ^ k for b, k in zip(state, self.round_keys[r])]
+            if r == 0:
+                break
+            mixed = []
+            for column in range(0, 16, 4):
+                a0, a1, a2, a3 = state[column:column + 4]
+                mixed.append(MUL14[a0] ^ MUL11[a1] ^ MUL13[a2] ^ MUL9[a3])
+                mixed.append(MUL9[a0] ^ MUL14[a1] ^ MUL11[a2] ^ MUL13[a3])
+                mixed.append(MUL13[a0] ^ MUL9[a1] ^ MUL14[a2] ^ MUL11[a3])
+                mixed.append(MUL11[a0] ^ MUL13[a1] ^ MUL9[a2] ^ MUL14[a3])
+            state = mixed
+        return bytes(state)
+
+    def decrypt_cbc(self, data: bytes, iv: bytes) -> bytes:
+        """
+        CBC模式解密\n
+        :param data: 密文，长度必须是16的倍数
+        :param iv: 16字节初始向量
+        :return: 明文
+        """
+        result = bytearray()
+        previous = iv
+        for i in range(0, len(data) - len(data) % BLOCK_SIZE, BLOCK_SIZE):
+            block = data[i:i + BLOCK_SIZE]
+            result.extend(b ^ p for b, p in zip(self.decrypt_block(block), previous))
+            previous = block
+        return bytes(result)
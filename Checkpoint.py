@@ -0,0 +1,219 @@
+# %% 导入包
+from bisect import bisect_left
+from hashlib import sha256
+from json import dumps
+from os import path, makedirs, replace, remove, fsync, stat
+from time import monotonic
+
+
+# %% 声明全局变量
+# 默认的检查点目录，每个任务一个日志文件
+CHECKPOINT_DIR = path.join(path.expanduser("~"), ".ZipCracker", "checkpoints")
+# 日志文件的第一行，后面跟着任务的键；格式变了要改版本号，旧日志会被当成不匹配而丢弃
+HEADER = "ZipCracker checkpoint 1 "
+# 压缩文件指纹读取的头部、尾部字节数
+FINGERPRINT_SIZE = 1 << 16
+# 两次落盘之间的最短间隔秒数
+FLUSH_INTERVAL = 5.0
+# 日志里追加的行数超过这个值时，把合并后的区间重写一遍，日志不会随运行时间无限增长
+COMPACT_LINES = 4096
+
+
+# %% 计算任务的键
+def file_fingerprint(file_path: str) -> str:
+    """
+    文件指纹：文件大小加上头部与尾部各64KiB的SHA-256，压缩文件被替换或修改后指纹就会变\n
+    :param file_path: 文件路径字符串
+    :return: 十六进制指纹
+    """
+    size = stat(file_path).st_size
+    digest = sha256(str(size).encode("ascii"))
+    with open(file_path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_SIZE))
+        if size > FINGERPRINT_SIZE:
+            f.seek(max(size - FINGERPRINT_SIZE, FINGERPRINT_SIZE))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def job_key(archive_path: str, seed: str, digit_range: range, dict_path: str = "") -> str:
+    """
+    任务的键：压缩文件指纹加上决定密码空间的配置，批大小、进程数不影响已完成的区间，不计入\n
+    :param archive_path: 压缩文件路径字符串
+    :param seed: 密码种子
+    :param digit_range: 位数取值范围
+    :param dict_path: 外部字典路径，不为空时区间是字典文件里的字节偏移，改用字典指纹代替种子和位数
+    :return: 十六进制的键
+    """
+    if dict_path:
+        space = ["dict", file_fingerprint(dict_path)]
+    else:
+        space = ["keyspace", seed, digit_range.start, digit_range.stop]
+    return sha256(dumps([file_fingerprint(archive_path), space]).encode("utf8")).hexdigest()
+
+
+# %% 定义一个类，记录已完成的区间
+class Checkpoint(object):
+    """
+    检查点日志类，记录一个任务里已经试完的[start, stop)区间：
+    穷举时是密码序号，外部字典时是字典文件里按行对齐的字节偏移\n
+    日志只追加写入，每行一个区间，按固定间隔fsync落盘；崩溃时最多丢掉最后一次落盘之后的进度，
+    写了一半的最后一行在读取时丢弃；打开时以及追加的行数超过COMPACT_LINES时，把已有的区间合并后原子地重写一遍\n
+    消费者完成区间的顺序是乱的，区间各自记录，恢复时只跳过真正试完的部分
+    """
+
+    def __init__(self, key: str, directory: str = CHECKPOINT_DIR, flush_interval: float = FLUSH_INTERVAL):
+        """
+        构造方法，读取同一个任务之前留下的日志\n
+        :param key: 任务的键，参见job_key
+        :param directory: 检查点目录
+        :param flush_interval: 两次落盘之间的最短间隔秒数
+        """
+        self.key = key
+        self.flush_interval = flush_interval
+        self.journal_path = path.join(directory, key[:32] + ".journal")
+        # 已完成的区间，按起点排序且互不重叠、互不相接
+        self.ranges = []
+        # 还没有落盘的区间
+        self.pending = []
+        # 上次重写之后追加到日志里的行数
+        self.appended = 0
+        self.last_flush = monotonic()
+        makedirs(directory, exist_ok=True)
+        self.load()
+        self.file = open(self.journal_path, "a", encoding="ascii")
+
+    def load(self):
+        """
+        读取日志并合并区间，然后重写日志\n
+        :return:
+        """
+        if path.isfile(self.journal_path):
+            with open(self.journal_path, encoding="ascii", errors="replace") as f:
+                if f.readline() == HEADER + self.key + "\n":
+                    for line in f:
+                        # 写了一半的最后一行没有换行符，丢弃
+                        fields = line.split()
+                        if not line.endswith("\n") or len(fields) != 2 or not all(x.isdigit() for x in fields):
+                            continue
+                        self.add_range(int(fields[0]), int(fields[1]))
+        self.rewrite()
+
+    def rewrite(self):
+        """
+        用临时文件原子地把合并后的区间重写成日志，重写过程中崩溃时旧日志仍然完好\n
+        :return:
+        """
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, "w", encoding="ascii") as f:
+            f.write(HEADER + self.key + "\n")
+            for start, stop in self.ranges:
+                f.write("%d %d\n" % (start, stop))
+            f.flush()
+            fsync(f.fileno())
+        replace(temp_path, self.journal_path)
+        self.appended = 0
+
+    def add_range(self, start: int, stop: int):
+        """
+        把一个区间并入已完成的区间，与前后相接或重叠的区间合并成一个\n
+        :param start: 起点
+        :param stop: 终点（不含）
+        :return:
+        """
+        if stop <= start:
+            return
+        index = bisect_left(self.ranges, (start, stop))
+        if index > 0 and self.ranges[index - 1][1] >= start:
+            index = index - 1
+            start = self.ranges[index][0]
+        end = index
+        while end < len(self.ranges) and self.ranges[end][0] <= stop:
+            stop = max(stop, self.ranges[end][1])
+            end = end + 1
+        self.ranges[index:end] = [(start, stop)]
+
+    def add(self, start: int, stop: int):
+        """
+        记录一个试完的区间，距离上次落盘超过间隔时顺便落盘\n
+        :param start: 起点
+        :param stop: 终点（不含）
+        :return:
+        """
+        self.add_range(start, stop)
+        self.pending.append((start, stop))
+        if monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        把还没落盘的区间追加到日志并fsync；追加的行数超过COMPACT_LINES时改为重写整个日志\n
+        :return:
+        """
+        self.last_flush = monotonic()
+        if not self.pending:
+            return
+        if self.appended + len(self.pending) >= COMPACT_LINES:
+            # 还没落盘的区间已经并进了self.ranges，重写时一起写进去
+            self.pending.clear()
+            self.file.close()
+            self.rewrite()
+            self.file = open(self.journal_path, "a", encoding="ascii")
+            return
+        self.file.write("".join("%d %d\n" % (start, stop) for start, stop in self.pending))
+        self.file.flush()
+        fsync(self.file.fileno())
+        self.appended = self.appended + len(self.pending)
+        self.pending.clear()
+
+    def remaining(self, start: int, stop: int) -> [range]:
+        """
+        [start, stop)里还没试过的部分\n
+        :param start: 起点
+        :param stop: 终点（不含）
+        :return: 由range对象组成的列表
+        """
+        result = []
+        for done_start, done_stop in self.ranges:
+            if done_stop <= start:
+                continue
+            if done_start >= stop:
+                break
+            if done_start > start:
+                result.append(range(start, done_start))
+            start = max(start, done_stop)
+        if start < stop:
+            result.append(range(start, stop))
+        return result
+
+    def completed(self, start: int = 0, stop: int = None) -> int:
+        """
+        [start, stop)里已经试完的数量\n
+        :param start: 起点
+        :param stop: 终点（不含），默认不限
+        :return: 数量
+        """
+        count = 0
+        for done_start, done_stop in self.ranges:
+            low = max(done_start, start)
+            high = done_stop if stop is None else min(done_stop, stop)
+            if high > low:
+                count = count + high - low
+        return count
+
+    def close(self):
+        """
+        落盘并关闭日志，任务被终止时调用，下次可以接着跑\n
+        :return:
+        """
+        self.flush()
+        self.file.close()
+
+    def discard(self):
+        """
+        关闭并删除日志，任务已经有了结论时调用\n
+        :return:
+        """
+        self.file.close()
+        if path.isfile(self.journal_path):
+            remove(self.journal_path)
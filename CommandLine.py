@@ -0,0 +1,196 @@
+# %% 导入包
+from argparse import ArgumentParser
+from json import dumps
+from sys import stdout, exit
+from os import path, makedirs
+from multiprocessing import freeze_support, cpu_count
+from KeySpace import generate_seed, CHARSETS
+from functools import partial
+from CrackEngine import CrackConfig, ExportConfig, StartPosition, WorkerPool, run_export
+from EventLog import configure
+from Checkpoint import CHECKPOINT_DIR
+from WordList import convert_text
+
+
+# %% 声明全局变量
+# 退出码：0找到全部压缩文件的密码或导出、转换完成，1有压缩文件没找到密码，2参数错误，3有消费者进程意外退出、任务中止，
+# 130被Ctrl+C终止，与shell里被SIGINT终止的进程一致
+EXIT_FOUND = 0
+EXIT_NOT_FOUND = 1
+EXIT_USAGE = 2
+EXIT_ERROR = 3
+EXIT_CANCELLED = 130
+
+
+# %% 解析参数
+def parse_seed(charset: str, seed: str) -> str:
+    """
+    根据字符集名称或自定义种子生成种子\n
+    :param charset: 逗号分隔的字符集名称，可选digits、lowercase、uppercase、punctuation
+    :param seed: 自定义种子，不为空时优先使用
+    :return: 种子字符串
+    """
+    if seed:
+        return seed
+    names = [name.strip() for name in charset.split(",") if name.strip()]
+    unknown = set(names) - set(name for name, _ in CHARSETS)
+    if unknown:
+        raise ValueError("未知的字符集 %s" % ",".join(sorted(unknown)))
+    return generate_seed(tuple(name in names for name, _ in CHARSETS))
+
+
+def parse_length(length: str) -> range:
+    """
+    解析位数范围，"4"表示只有4位，"1-4"表示1到4位\n
+    :param length: 位数范围字符串
+    :return: range对象
+    """
+    low, _, high = length.partition("-")
+    low = int(low)
+    high = int(high) if high else low
+    if low < 0 or high < low:
+        raise ValueError("位数范围 %s 不合法" % length)
+    return range(low, high + 1)
+
+
+def build_parser() -> ArgumentParser:
+    """
+    构造命令行参数解析器\n
+    :return: ArgumentParser对象
+    """
+    parser = ArgumentParser(prog="python -m CommandLine", description="不依赖图形界面的压缩包密码破解与字典导出")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("crack", "export"):
+        command = commands.add_parser(name)
+        command.add_argument("--charset", default="digits", help="逗号分隔的字符集：digits,lowercase,uppercase,punctuation")
+        command.add_argument("--seed", default="", help="自定义种子，设置后忽略--charset")
+        command.add_argument("--length", default="1-4", help="位数范围，如4或1-6")
+        command.add_argument("--batch-size", type=int, default=20000, help="每批密码数量")
+        command.add_argument("--log-level", default=None, help="日志级别，默认读取环境变量ZIPCRACKER_LOG")
+    crack = commands.choices["crack"]
+    crack.add_argument("archive", nargs="+", help="zip或rar压缩文件路径，可以有多个，共用同一个进程池依次破解")
+    crack.add_argument("--dict", default="", help="外部字典路径，设置后不再枚举内置字典")
+    crack.add_argument("--extract", default="", help="解压路径，默认为各压缩文件所在目录")
+    crack.add_argument("--workers", type=int, default=cpu_count(), help="消费者进程数")
+    crack.add_argument("--start-method", default=None, help="消费者进程启动方式：fork、spawn或forkserver")
+    crack.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR, help="检查点目录，同样的任务再次运行时跳过已经试完的部分")
+    crack.add_argument("--no-checkpoint", action="store_true", help="不读取也不记录检查点")
+    start = crack.add_mutually_exclusive_group()
+    start.add_argument("--start-index", type=int, help="穷举时从这个序号开始，序号从0开始")
+    start.add_argument("--start-at", metavar="PASSWORD", help="穷举时从这个密码开始")
+    start.add_argument("--start-percent", type=float, help="从整个穷举范围或整个字典文件的这个百分比处开始")
+    start.add_argument("--start-offset", type=int, help="外部字典从这个字节偏移开始，落在一行中间时从下一行开始")
+    start.add_argument("--start-line", type=int, help="外部字典从这一行开始，行号从1开始")
+    crack.add_argument("--memory-budget", type=int, default=64, help="任务缓冲区占用的内存上限，单位MiB，写满时生产者等待")
+    export = commands.choices["export"]
+    export.add_argument("output", help="导出的字典文件路径，扩展名为.zcwl时导出紧凑字典")
+    convert = commands.add_parser("convert")
+    convert.add_argument("input", help="每行一个密码的文本字典路径")
+    convert.add_argument("output", help="紧凑字典路径，建议以.zcwl为扩展名")
+    convert.add_argument("--log-level", default=None, help="日志级别，默认读取环境变量ZIPCRACKER_LOG")
+    return parser
+
+
+def parse_start(args) -> StartPosition:
+    """
+    从命令行参数里取出起始位置\n
+    :param args: 解析后的参数
+    :return: 起始位置，没有指定时返回None
+    """
+    for kind, value in (
+            ("index", args.start_index), ("candidate", args.start_at), ("percent", args.start_percent),
+            ("offset", args.start_offset), ("line", args.start_line)
+    ):
+        if value is not None:
+            return StartPosition(kind, value)
+    return None
+
+
+# %% 输出JSON行
+def emit_json(event: str, data, archive: str = None):
+    """
+    把一个事件作为一行JSON写到标准输出并立即刷新\n
+    :param event: 事件名称
+    :param data: 事件数据，ProgressSnapshot、RingStats、密码字符串、密码数量、错误信息或None
+    :param archive: 事件所属的压缩文件路径，导出字典时为None
+    :return:
+    """
+    record = {"event": event}
+    if archive is not None:
+        record["archive"] = archive
+    if event in ("progress", "pipeline"):
+        record.update(data._asdict())
+    elif event == "found":
+        record["password"] = data
+    elif event == "done" and data is not None:
+        record["count"] = data
+    elif event == "error":
+        record["message"] = data
+    stdout.write(dumps(record, ensure_ascii=False) + "\n")
+    stdout.flush()
+
+
+def main(argv: [str] = None) -> int:
+    """
+    命令行入口\n
+    :param argv: 参数列表，默认取sys.argv
+    :return: 退出码
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    configure(args.log_level)
+    if args.command == "convert":
+        if not path.isfile(args.input):
+            parser.error("找不到字典文件 %s" % args.input)
+        emit_json("done", convert_text(args.input, args.output))
+        return EXIT_FOUND
+    try:
+        seed = parse_seed(args.charset, args.seed)
+        digit_range = parse_length(args.length)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.command == "export":
+        run_export(ExportConfig(seed, digit_range, args.output, args.batch_size), emit_json)
+        emit_json("done", None)
+        return EXIT_FOUND
+    for archive in args.archive:
+        if not path.isfile(archive):
+            parser.error("找不到压缩文件 %s" % archive)
+    if args.dict and not path.isfile(args.dict):
+        parser.error("找不到字典文件 %s" % args.dict)
+    if args.workers < 1:
+        parser.error("进程数必须至少为1")
+    if args.memory_budget < 1:
+        parser.error("内存预算必须至少为1 MiB")
+    exit_code = EXIT_FOUND
+    # 进程池只启动一次，多个压缩文件依次破解
+    with WorkerPool(args.workers, args.start_method, args.memory_budget << 20) as pool:
+        for archive in args.archive:
+            extract_path = args.extract or path.dirname(path.abspath(archive))
+            makedirs(extract_path, exist_ok=True)
+            config = CrackConfig(
+                seed, digit_range, args.dict, archive, extract_path, args.workers, args.batch_size,
+                checkpoint_dir="" if args.no_checkpoint else args.checkpoint_dir, start_position=parse_start(args)
+            )
+            # 破解在后台线程里运行，主线程收到Ctrl+C时终止任务，等它输出"cancelled"并保存检查点后退出
+            job = pool.submit(config, partial(emit_json, archive=archive))
+            try:
+                if job.wait() is None:
+                    exit_code = max(exit_code, EXIT_NOT_FOUND)
+            except KeyboardInterrupt:
+                job.cancel()
+                job.wait()
+                return EXIT_CANCELLED
+            except ValueError as e:
+                parser.error(str(e))
+            except RuntimeError as e:
+                # 已经试完的区间在检查点里，下一个压缩文件照常破解
+                emit_json("error", str(e), archive)
+                exit_code = EXIT_ERROR
+    return exit_code
+
+
+# %% 运行
+if __name__ == "__main__":
+    freeze_support()
+    exit(main())
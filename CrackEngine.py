@@ -0,0 +1,805 @@
+# %% 导入包
+from collections import namedtuple
+from multiprocessing import get_context, get_all_start_methods, cpu_count
+from os import environ, path
+from threading import Thread, Event, Lock
+from queue import Queue, Empty, Full
+from concurrent.futures import Future
+from time import monotonic
+from asyncio import wrap_future
+from functools import partial
+from KeySpace import KeySpace
+from ProgressMeter import ProgressMeter, ProgressSnapshot
+from ExtractArchive import extract_shared, extract_no_password, init_worker, PRELOAD_MODULES
+from SharedRing import SharedRing, SharedFlag, ByteRange, RingStats, SLOT_HEADER, RANGE_STRUCT
+from Checkpoint import Checkpoint, job_key
+from WordList import WordList, WordListWriter, is_wordlist, WORDLIST_SUFFIX
+from Dictionary import open_dictionary, estimate_line_size, split_ranges, count_lines, align_offset, line_offset
+from EventLog import EventLog
+
+
+# %% 声明全局变量
+log = EventLog("CrackEngine")
+# 破解任务的配置：seed为密码种子，digit_range为位数取值范围，dict_path不为空时改用外部字典，
+# archive_path为压缩文件路径，extract_path为解压路径，consumer_number为消费者进程数，batch_size为每批密码数量，
+# start_method为消费者进程的启动方式，参见get_pool_context，只在临时创建进程池时使用，常驻进程池在创建时就已经确定；
+# memory_budget为积压在任务缓冲区里的密码占用的字节数，参见plan_task_ring，不指定时沿用进程池的预算；
+# checkpoint_dir为检查点目录，不为空时记录已经试完的区间，下次同样的任务跳过它们，参见Checkpoint；
+# start_position为起始位置，从这里开始试，之前的部分不生成也不读取，参见StartPosition
+CrackConfig = namedtuple(
+    "CrackConfig",
+    [
+        "seed", "digit_range", "dict_path", "archive_path", "extract_path", "consumer_number", "batch_size",
+        "start_method", "memory_budget", "checkpoint_dir", "start_position"
+    ],
+    defaults=(None, None, None, None)
+)
+# 起始位置：kind为定位方式，value为对应的值；穷举时可以按序号（"index"）、密码（"candidate"）或百分比（"percent"）定位，
+# 外部字典可以按字节偏移（"offset"）、行号（"line"，从1开始）或百分比定位，字节偏移落在一行中间时从下一行开始
+StartPosition = namedtuple("StartPosition", ["kind", "value"])
+START_KINDS = ("index", "candidate", "percent", "offset", "line")
+# 导出字典的配置：seed为密码种子，digit_range为位数取值范围，file_path为导出文件路径，batch_size为每批密码数量
+ExportConfig = namedtuple("ExportConfig", ["seed", "digit_range", "file_path", "batch_size"])
+# 等待消费者消息、等待缓冲区空位时每隔多少秒检查一次终止事件
+POLL_INTERVAL = 0.1
+# 任务结束后等待消费者返回的最长秒数，消费者进程被杀掉时它的结果永远不会就绪，超时后重建进程池
+FINISH_TIMEOUT = 10.0
+# 结果缓冲区每个槽位的字节数，结果只有数量和一个密码，不需要很大
+RESULT_SLOT_SIZE = 1 << 16
+# 积压在任务缓冲区里的密码默认占用的字节数
+MEMORY_BUDGET = 64 << 20
+# 任务消息只有区间和毒丸，槽位大小固定为一个区间消息的大小；槽位数量是缓冲区深度的上限，实际深度由内存预算决定
+TASK_SLOT_SIZE = SLOT_HEADER.size + RANGE_STRUCT.size
+TASK_SLOTS = 4096
+# 消费者进程启动方式的环境变量，可选fork、spawn、forkserver，不设置时沿用平台默认值
+START_METHOD_ENV = "ZIPCRACKER_START_METHOD"
+
+
+# %% 选择消费者进程的启动方式
+def get_pool_context(start_method: str = None):
+    """
+    获取创建进程池用的上下文；forkserver方式下服务进程预先导入消费者需要的模块，
+    之后每个消费者都从已经导入好的服务进程fork出来，省去逐个导入的时间\n
+    :param start_method: 启动方式，不指定时读取环境变量ZIPCRACKER_START_METHOD，平台不支持时沿用默认值
+    :return: multiprocessing上下文
+    """
+    if start_method is None:
+        start_method = environ.get(START_METHOD_ENV) or None
+    if start_method not in get_all_start_methods():
+        start_method = None
+    context = get_context(start_method)
+    if start_method == "forkserver":
+        context.set_forkserver_preload(list(PRELOAD_MODULES))
+    return context
+
+
+# %% 按内存预算确定任务缓冲区的大小
+def plan_task_ring(processes: int, memory_budget: int, batch_size: int, candidate_size: int) -> int:
+    """
+    把内存预算换算成任务缓冲区的深度：每条消息代表一批密码，消费者取出后要把这批密码生成或读进内存，
+    深度写满后生产者阻塞，积压的密码最多占用这么多内存\n
+    预算再小也保证每个消费者有两条消息（毒丸至少要一条），深度不超过缓冲区的槽位数\n
+    :param processes: 消费者进程数
+    :param memory_budget: 内存预算字节数，None时为MEMORY_BUDGET
+    :param batch_size: 每批密码数量
+    :param candidate_size: 估计的每个密码的字节数
+    :return: 缓冲区深度
+    """
+    if memory_budget is None:
+        memory_budget = MEMORY_BUDGET
+    if memory_budget < 1:
+        raise ValueError("内存预算必须为正数，当前值为%d" % memory_budget)
+    depth = memory_budget // max(batch_size * candidate_size, 1)
+    return min(max(depth, processes * 2, 4), max(TASK_SLOTS, processes * 2))
+
+
+def estimate_candidate_size(config: CrackConfig, keyspace: KeySpace) -> int:
+    """
+    估计每个密码的字节数：文本字典按抽样的平均行长，紧凑字典按各个桶的平均长度，穷举按最长的位数\n
+    :param config: 破解配置
+    :param keyspace: 密码空间，KeySpace或紧凑字典的WordList
+    :return: 每个密码的字节数，至少为1
+    """
+    if is_text_dict(config, keyspace):
+        view = open_dictionary(config.dict_path)
+        if view is None:
+            return 1
+        with view:
+            return estimate_line_size(view)
+    if type(keyspace) == WordList:
+        return max(sum(length * count for length, count in keyspace.stats()) // max(len(keyspace), 1), 1)
+    if len(keyspace.digit_range) == 0 or len(keyspace.seed) == 0:
+        return 1
+    return max(len(keyspace.seed.encode("utf8")) * keyspace.digit_range[-1] // len(keyspace.seed), 1)
+
+
+# %% 确定密码空间与起始位置
+def open_keyspace(config: CrackConfig) -> KeySpace:
+    """
+    打开任务的密码空间：外部字典是紧凑字典时，它本身就是按序号排列的密码空间，用法与KeySpace相同\n
+    :param config: 破解配置
+    :return: KeySpace，或者紧凑字典的WordList，用完需要调用close
+    """
+    if config.dict_path and is_wordlist(config.dict_path):
+        return WordList(config.dict_path)
+    return KeySpace(config.seed, config.digit_range)
+
+
+def is_text_dict(config: CrackConfig, keyspace: KeySpace) -> bool:
+    """
+    是否使用文本字典，文本字典按字节偏移分发，其余按序号分发\n
+    :param config: 破解配置
+    :param keyspace: 密码空间
+    :return: 是否使用文本字典
+    """
+    return bool(config.dict_path) and type(keyspace) != WordList
+
+
+def resolve_start(config: CrackConfig, keyspace: KeySpace) -> int:
+    """
+    把起始位置换算成区间的起点：穷举和紧凑字典是密码序号，文本字典是按行对齐的字节偏移\n
+    :param config: 破解配置
+    :param keyspace: 密码空间
+    :return: 起点，超出范围时取范围的终点
+    """
+    position = config.start_position
+    if position is None:
+        return 0
+    kind, value = position
+    if kind not in START_KINDS:
+        raise ValueError("未知的起始位置类型 %s" % kind)
+    text_dict = is_text_dict(config, keyspace)
+    extent = path.getsize(config.dict_path) if text_dict else len(keyspace)
+    if kind == "percent":
+        if not 0 <= value <= 100:
+            raise ValueError("起始百分比必须在0到100之间，当前值为%s" % value)
+        start = int(extent * value / 100)
+    elif text_dict and kind in ("index", "candidate"):
+        raise ValueError("文本字典只能按字节偏移、行号或百分比定位")
+    elif type(keyspace) == WordList and kind in ("offset", "candidate"):
+        raise ValueError("紧凑字典只能按序号、行号或百分比定位")
+    elif not config.dict_path and kind in ("offset", "line"):
+        raise ValueError("穷举只能按序号、密码或百分比定位")
+    elif kind == "candidate":
+        start = keyspace.index(value)
+    elif kind == "line" and text_dict:
+        return line_offset(config.dict_path, value)
+    elif kind == "line":
+        start = value - 1
+    else:
+        start = value
+    start = min(max(start, 0), extent)
+    if text_dict:
+        start = align_offset(config.dict_path, start)
+    return start
+
+
+# %% 不依赖PyQt5的生产者
+def put_until_stopped(queue: Queue, message, stop_event: Event) -> bool:
+    """
+    放入一条消息，缓冲区满时一边等待一边检查终止事件\n
+    :param queue: 队列或SharedRing
+    :param message: 消息
+    :param stop_event: 终止事件
+    :return: 是否放入成功，被终止时返回False
+    """
+    while not stop_event.is_set():
+        try:
+            queue.put(message, timeout=POLL_INTERVAL)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def produce_ranges(
+        queue: Queue, keyspace: KeySpace, batch_size: int, consumer_number: int, stop_event: Event,
+        remaining: [range] = None
+):
+    """
+    按序号区间分发密码，队列里只放range对象，由消费者自己在本地枚举密码\n
+    :param queue: 连接生产者与消费者的队列
+    :param keyspace: 密码空间，KeySpace或紧凑字典的WordList
+    :param batch_size: 每个区间的密码数量
+    :param consumer_number: 消费者数量，决定释放几颗毒丸
+    :param stop_event: 终止事件
+    :param remaining: 还要试的序号区间，默认为整个密码空间
+    :return:
+    """
+    if remaining is None:
+        remaining = [range(0, len(keyspace))]
+    for part in remaining:
+        for passwords_range in keyspace.split(batch_size, part.start, part.stop):
+            if not put_until_stopped(queue, passwords_range, stop_event):
+                return
+    for _ in range(consumer_number):
+        put_until_stopped(queue, tuple(), stop_event)
+
+
+def produce_dict(
+        queue: SharedRing, dict_path: str, batch_size: int, consumer_number: int, stop_event: Event,
+        remaining: [range] = None
+):
+    """
+    把外部字典切成按行对齐的字节区间放入队列，消费者自己映射字典文件并按字节读出这些行，
+    生产者不读取、不解析密码，队列里也不传密码\n
+    :param queue: 连接生产者与消费者的缓冲区
+    :param dict_path: 外部字典文件路径字符串
+    :param batch_size: 每批密码数量，按抽样估计的平均行长换算成每个区间的字节数
+    :param consumer_number: 消费者数量，决定释放几颗毒丸
+    :param stop_event: 终止事件
+    :param remaining: 还要读的字节区间，必须按行对齐，默认为整个文件
+    :return:
+    """
+    view = open_dictionary(dict_path)
+    if view is not None:
+        with view:
+            if remaining is None:
+                remaining = [range(0, len(view))]
+            chunk_size = batch_size * estimate_line_size(view)
+            for part in remaining:
+                for byte_range in split_ranges(view, part.start, part.stop, chunk_size):
+                    if not put_until_stopped(queue, ByteRange(byte_range.start, byte_range.stop), stop_event):
+                        return
+    for _ in range(consumer_number):
+        put_until_stopped(queue, tuple(), stop_event)
+
+
+def count_dict(meter: ProgressMeter, dict_path: str, remaining: [range], stop_event: Event):
+    """
+    在后台统计文本字典里要试的行数作为进度总数，不耽误破解开始；统计过程中总数按已扫描的比例估计\n
+    :param meter: 进度汇总
+    :param dict_path: 外部字典文件路径字符串
+    :param remaining: 还要读的字节区间
+    :param stop_event: 终止事件
+    :return:
+    """
+    view = open_dictionary(dict_path)
+    if view is None:
+        return
+    with view:
+        total = count_lines(view, remaining, meter.set_total, stop_event)
+    if total is not None:
+        meter.set_total(total)
+        log.debug("字典 %s 共 %d 行要试", dict_path, total)
+
+
+# %% 运行破解与导出
+def run_crack(config: CrackConfig, callback=None, stop_event: Event = None, pool=None) -> str:
+    """
+    在当前线程里运行一次破解，直到找到密码、全部密码都试完或者被终止\n
+    :param config: 破解配置
+    :param callback: 事件回调callback(event, data)：event为"progress"时data是ProgressSnapshot，按固定间隔合并回调；
+    每次"progress"之前回调一次"pipeline"，data是任务缓冲区的RingStats；
+    为"found"时data是密码字符串，空字符串表示压缩包密码为空；为"failed"或"cancelled"时data是None
+    :param stop_event: 终止事件，设置后尽快停止，默认不可终止
+    :param pool: 常驻的WorkerPool，任务结束后进程池继续保留；不指定时临时创建一个，任务结束后关闭
+    :return: 找到的密码，空字符串表示密码为空，没找到返回None；有消费者进程意外退出时抛出RuntimeError，已经试完的区间保留在检查点里
+    """
+    if callback is None:
+        callback = lambda event, data: None
+    if stop_event is None:
+        stop_event = Event()
+    if config.consumer_number < 1:
+        raise ValueError("进程数必须至少为1，当前值为%d" % config.consumer_number)
+    if config.memory_budget is not None and config.memory_budget < 1:
+        raise ValueError("内存预算必须为正数，当前值为%d" % config.memory_budget)
+    keyspace = open_keyspace(config)
+    try:
+        start = resolve_start(config, keyspace)
+        # 如果空密码解压成功，无需启动生产者和消费者
+        if extract_no_password(config.archive_path, config.extract_path):
+            callback("found", "")
+            return ""
+        owner = pool is None
+        if owner:
+            pool = WorkerPool(config.consumer_number, config.start_method, config.memory_budget)
+        # 进程池的缓冲区同一时间只能给一个任务用，多个任务依次运行
+        with pool.lock:
+            try:
+                checkpoint = open_checkpoint(config)
+                return run_crack_on_pool(config, callback, stop_event, pool, keyspace, not owner, checkpoint, start)
+            finally:
+                if owner:
+                    pool.terminate()
+    finally:
+        if type(keyspace) == WordList:
+            keyspace.close()
+
+
+def open_checkpoint(config: CrackConfig) -> Checkpoint:
+    """
+    打开任务的检查点，检查点目录不可用时不影响破解\n
+    :param config: 破解配置
+    :return: 检查点，没有配置检查点目录或者打不开时返回None
+    """
+    if not config.checkpoint_dir:
+        return None
+    try:
+        key = job_key(config.archive_path, config.seed, config.digit_range, config.dict_path)
+        return Checkpoint(key, config.checkpoint_dir)
+    except OSError as e:
+        log.warning("无法打开检查点 %s，本次不记录进度：%s", config.checkpoint_dir, e)
+        return None
+
+
+def run_crack_on_pool(
+        config: CrackConfig, callback, stop_event: Event, pool: "WorkerPool", keyspace: KeySpace, reuse: bool = True,
+        checkpoint: Checkpoint = None, start: int = 0
+) -> str:
+    """
+    在已经启动的进程池上运行一次破解，调用者需要持有进程池的锁\n
+    :param config: 破解配置
+    :param callback: 事件回调，参见run_crack
+    :param stop_event: 终止事件
+    :param pool: 进程池
+    :param keyspace: 密码空间，KeySpace或紧凑字典的WordList
+    :param reuse: 任务结束后进程池是否还要继续使用，不再使用时由调用者直接杀掉消费者，不必等它们结束
+    :param checkpoint: 检查点，跳过其中已经试完的区间并记录新试完的区间；任务有了结论就删除，被终止时保留
+    :param start: 区间的起点，参见resolve_start
+    :return: 找到的密码，没找到返回None
+    """
+    # 消费者数量超过常驻进程数时，多出来的任务只能排队，没有意义
+    consumer_number = min(config.consumer_number, pool.processes)
+    queue = pool.tasks
+    emit_queue = pool.results
+    pool.cancel_event.clear()
+    queue.reset_stats()
+    memory_budget = pool.memory_budget if config.memory_budget is None else config.memory_budget
+    depth = plan_task_ring(
+        consumer_number, memory_budget, config.batch_size, estimate_candidate_size(config, keyspace)
+    )
+    queue.set_depth(depth)
+    log.debug("任务缓冲区深度 %d", depth)
+    # 穷举和紧凑字典的区间是密码序号，文本字典是字典文件的字节偏移
+    text_dict = is_text_dict(config, keyspace)
+    scope = range(start, path.getsize(config.dict_path) if text_dict else len(keyspace))
+    remaining = [scope]
+    completed = 0
+    if checkpoint is not None:
+        remaining = checkpoint.remaining(scope.start, scope.stop)
+        completed = checkpoint.completed(scope.start, scope.stop)
+        if completed:
+            log.info("从检查点恢复，已完成 %d / %d", completed, len(scope))
+    if text_dict:
+        meter = ProgressMeter()
+        Thread(target=count_dict, daemon=True, args=(meter, config.dict_path, remaining, stop_event)).start()
+        producer = Thread(
+            target=produce_dict, daemon=True,
+            args=(queue, config.dict_path, config.batch_size, consumer_number, stop_event, remaining)
+        )
+    else:
+        # 起点之前的密码不试，进度里当作已经处理过
+        meter = ProgressMeter(len(keyspace), count=scope.start + completed)
+        producer = Thread(
+            target=produce_ranges, daemon=True,
+            args=(queue, keyspace, config.batch_size, consumer_number, stop_event, remaining)
+        )
+    producer.start()
+    result = None
+    lost = False
+    tasks = []
+    try:
+        for _ in range(consumer_number):
+            tasks.append(pool.pool.apply_async(
+                extract_shared, args=(config.archive_path, config.extract_path, keyspace, config.dict_path),
+                error_callback=lambda e: log.error("消费者进程异常退出 %s %s", type(e), e)
+            ))
+        workers = pool.workers()
+        finished_num = 0
+        while not stop_event.is_set():
+            try:
+                signal = emit_queue.get(timeout=POLL_INTERVAL)
+            except Empty:
+                # 密码太长放不进结果缓冲区时，找到密码的消费者只能通过返回值回报
+                result = returned_result(tasks)
+                if result is not None:
+                    break
+                # 消费者抛出异常或者进程被杀掉时，它手上的区间没有试完，也不会再有毒丸，不能当作密码找遍了
+                lost = lost_worker(tasks, workers)
+                if lost:
+                    break
+                continue
+            # 只有全部消费者都吃到毒丸，才算密码找遍了全不对
+            if type(signal) == tuple and len(signal) == 0:
+                finished_num = finished_num + 1
+                if finished_num < consumer_number:
+                    continue
+                break
+            if type(signal) == str:
+                result = signal
+                break
+            if type(signal) == range:
+                snapshot = meter.add(len(signal), keyspace[signal.stop - 1])
+                done_range = signal
+            else:
+                snapshot = meter.add(signal.count, signal.last)
+                done_range = range(signal.start, signal.stop)
+            if checkpoint is not None:
+                checkpoint.add(done_range.start, done_range.stop)
+            if snapshot is not None:
+                callback("pipeline", queue.stats())
+                callback("progress", snapshot)
+    finally:
+        # 找到密码或者被终止后立即通知全部消费者，它们在下一个密码之前就会停下
+        cancelled = stop_event.is_set()
+        stop_event.set()
+        pool.cancel_event.set()
+        producer.join()
+        # 先取指标，收尾时清空缓冲区的等待不算在任务里
+        stats = queue.stats()
+        if reuse and lost:
+            # 死掉的消费者可能还占着缓冲区的锁，直接重建进程池
+            pool.restart()
+        elif reuse:
+            pool.finish(tasks, consumer_number)
+        if checkpoint is not None:
+            close_checkpoint(checkpoint, result, scope.stop)
+    log.info(
+        "任务缓冲区 %d 个槽位，生产者累计等待 %.3f 秒，消费者累计等待 %.3f 秒",
+        stats.capacity, stats.put_wait, stats.get_wait
+    )
+    callback("pipeline", stats)
+    callback("progress", meter.snapshot())
+    if lost:
+        # 没试完的区间没有记进检查点，下次运行会补上
+        raise RuntimeError("消费者进程意外退出，任务已中止")
+    if result is None and cancelled:
+        callback("cancelled", None)
+    elif result is None:
+        callback("failed", None)
+    else:
+        callback("found", result)
+    return result
+
+
+def returned_result(tasks: list) -> str:
+    """
+    从已经返回的消费者里找出找到的密码\n
+    :param tasks: apply_async返回的结果对象
+    :return: 找到的密码，没有消费者找到密码时返回None
+    """
+    for task in tasks:
+        if task.ready() and task.successful() and task.get() is not None:
+            return task.get()
+    return None
+
+
+def lost_worker(tasks: list, workers: list) -> bool:
+    """
+    检查有没有消费者丢掉了任务：任务抛出了异常，或者任务开始时的消费者进程已经退出；
+    常驻进程池的进程不会自己退出，退出了只能是被杀掉了，它手上的任务永远不会返回\n
+    :param tasks: apply_async返回的结果对象
+    :param workers: 任务开始时的消费者进程
+    :return: 是否有消费者丢掉了任务
+    """
+    if any(task.ready() and not task.successful() for task in tasks):
+        return True
+    return any(worker.exitcode is not None for worker in workers)
+
+
+def close_checkpoint(checkpoint: Checkpoint, result: str, extent: int):
+    """
+    任务结束时处理检查点：找到了密码或者全部区间都试完了，任务有了结论，删除检查点；否则落盘保留，
+    从中间开始的任务试完了后半段，前半段可能还没试，检查点同样保留\n
+    :param checkpoint: 检查点
+    :param result: 找到的密码，没找到为None
+    :param extent: 区间的总范围
+    :return:
+    """
+    if result is not None or not checkpoint.remaining(0, extent):
+        checkpoint.discard()
+    else:
+        checkpoint.close()
+
+
+def run_export(config: ExportConfig, callback=None, stop_event: Event = None) -> int:
+    """
+    在当前线程里把内置字典顺序写入文件，写文件受磁盘限制，单线程即可；文件扩展名为.zcwl时导出紧凑字典，参见WordList\n
+    :param config: 导出配置
+    :param callback: 事件回调callback(event, data)：event为"progress"时data是ProgressSnapshot，按固定间隔合并回调；
+    被终止时回调"cancelled"，data是None
+    :param stop_event: 终止事件，设置后尽快停止，默认不可终止
+    :return: 写入的密码数量
+    """
+    if callback is None:
+        callback = lambda event, data: None
+    if stop_event is None:
+        stop_event = Event()
+    if config.file_path.lower().endswith(WORDLIST_SUFFIX):
+        return export_wordlist(config, callback, stop_event)
+    keyspace = KeySpace(config.seed, config.digit_range)
+    meter = ProgressMeter(len(keyspace))
+    with open(config.file_path, "ab") as f:
+        for passwords_range in keyspace.split(config.batch_size):
+            if stop_event.is_set():
+                callback("cancelled", None)
+                return meter.count
+            f.write(keyspace.pack(passwords_range.start, passwords_range.stop))
+            snapshot = meter.update(passwords_range.stop, keyspace[passwords_range.stop - 1])
+            if snapshot is not None:
+                callback("progress", snapshot)
+    callback("progress", meter.snapshot())
+    return len(keyspace)
+
+
+def export_wordlist(config: ExportConfig, callback, stop_event: Event) -> int:
+    """
+    把内置字典导出成紧凑字典，被终止时不留下文件\n
+    :param config: 导出配置
+    :param callback: 事件回调，参见run_export
+    :param stop_event: 终止事件
+    :return: 处理过的密码数量
+    """
+    keyspace = KeySpace(config.seed, config.digit_range)
+    meter = ProgressMeter(len(keyspace))
+    # 种子是互不重复的单字节字符时，同一位数的密码长度相同且不会重复，整段直接写进对应的桶，不必逐个去重
+    packed = keyspace.single_byte and len(set(keyspace.seed)) == len(keyspace.seed)
+    writer = WordListWriter(config.file_path, dedupe=not packed)
+    try:
+        for passwords_range in keyspace.split(config.batch_size):
+            if stop_event.is_set():
+                writer.discard()
+                callback("cancelled", None)
+                return meter.count
+            start = passwords_range.start
+            # 一个区间可能跨越两种位数，按位数拆开
+            while packed and start < passwords_range.stop:
+                digit, offset = keyspace.locate(start)
+                end = min(passwords_range.stop, start + len(keyspace.seed) ** digit - offset)
+                writer.add_packed(digit, keyspace.pack(start, end, b""))
+                start = end
+            # 不能整段写入时逐个写入并去重
+            for password in keyspace.iterate_bytes(start, passwords_range.stop):
+                writer.add(password)
+            snapshot = meter.update(passwords_range.stop, keyspace[passwords_range.stop - 1])
+            if snapshot is not None:
+                callback("progress", snapshot)
+    except BaseException:
+        writer.discard()
+        raise
+    writer.close()
+    callback("progress", meter.snapshot())
+    return len(keyspace)
+
+
+# %% 定义一个类，管理常驻的消费者进程池
+class WorkerPool(object):
+    """
+    常驻的消费者进程池，由应用程序或命令行持有，多个破解任务依次提交进来：
+    进程只启动一次，消费者换压缩文件时也不必重启\n
+    任务和结果通过两个共享内存环形缓冲区传递，它们和终止标志都在启动进程时交给消费者；
+    任务缓冲区的大小由内存预算决定，写满时生产者阻塞
+    """
+
+    def __init__(self, processes: int = None, start_method: str = None, memory_budget: int = None):
+        """
+        构造方法，立即创建缓冲区并启动消费者进程\n
+        :param processes: 消费者进程数，默认为CPU核数
+        :param start_method: 消费者进程的启动方式，参见get_pool_context
+        :param memory_budget: 任务缓冲区的内存预算字节数，参见plan_task_ring，任务配置里没有指定时使用
+        """
+        self.processes = processes or cpu_count()
+        self.context = get_pool_context(start_method)
+        if memory_budget is not None and memory_budget < 1:
+            raise ValueError("内存预算必须为正数，当前值为%d" % memory_budget)
+        self.memory_budget = memory_budget
+        self.lock = Lock()
+        self.start()
+
+    def start(self):
+        """
+        创建缓冲区、终止标志并启动消费者进程\n
+        :return:
+        """
+        self.tasks = SharedRing(self.context, max(TASK_SLOTS, self.processes * 2), TASK_SLOT_SIZE)
+        self.results = SharedRing(self.context, max(self.processes * 4, 8), RESULT_SLOT_SIZE)
+        # 消费者逐个密码检查终止标志，找到密码的消费者自己设置，其余消费者立即停下
+        self.cancel_event = SharedFlag(self.context)
+        self.pool = self.context.Pool(
+            processes=self.processes, initializer=init_worker, initargs=(self.tasks, self.results, self.cancel_event)
+        )
+
+    def __enter__(self):
+        """
+        进入with语句\n
+        :return: 自身
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        退出with语句时关闭进程池\n
+        :return:
+        """
+        self.close()
+
+    def submit(self, config: CrackConfig, callback=None):
+        """
+        在后台启动一次使用本进程池的破解\n
+        :param config: 破解配置
+        :param callback: 事件回调，参见run_crack
+        :return: 任务句柄
+        """
+        return start_crack(config, callback, self)
+
+    def finish(self, tasks: list, consumer_number: int):
+        """
+        结束一个任务：常驻进程不能杀掉，通知消费者结束，清空任务缓冲区后补上毒丸叫醒还在等待的消费者，
+        等它们都返回后再清空两个缓冲区，留给下一个任务；超过FINISH_TIMEOUT还没有全部返回，
+        说明有消费者进程被杀掉了，它的结果永远不会就绪，只能杀掉全部消费者重建进程池\n
+        :param tasks: apply_async返回的结果对象
+        :param consumer_number: 消费者数量
+        :return:
+        """
+        self.cancel_event.set()
+        self.tasks.clear()
+        for _ in range(consumer_number):
+            self.tasks.put(tuple())
+        deadline = monotonic() + FINISH_TIMEOUT
+        for task in tasks:
+            # 结果缓冲区写满时消费者会阻塞，等待期间要不断清空
+            while not task.ready():
+                if monotonic() >= deadline:
+                    log.warning("消费者 %.0f 秒内没有全部返回，重建进程池", FINISH_TIMEOUT)
+                    self.restart()
+                    return
+                self.results.clear()
+                task.wait(POLL_INTERVAL)
+        self.tasks.clear()
+        self.results.clear()
+
+    def workers(self) -> list:
+        """
+        当前的消费者进程，进程池会自动补上退出的进程，调用者要自己保留任务开始时的列表\n
+        :return: 由multiprocessing.Process组成的列表
+        """
+        return list(self.pool._pool)
+
+    def restart(self):
+        """
+        杀掉全部消费者进程，重新创建缓冲区并启动消费者进程\n
+        :return:
+        """
+        self.terminate()
+        self.start()
+
+    def close(self):
+        """
+        等待正在运行的任务结束后关闭进程池\n
+        :return:
+        """
+        self.pool.close()
+        self.pool.join()
+        self.tasks.close()
+        self.results.close()
+
+    def terminate(self):
+        """
+        立即杀掉全部消费者进程\n
+        :return:
+        """
+        self.pool.terminate()
+        self.pool.join()
+        self.tasks.close()
+        self.results.close()
+
+
+# %% 定义一个类，在后台线程里运行任务
+class Job(object):
+    """
+    后台任务句柄，不阻塞调用者：progress()查询最新进度，pipeline()查询任务缓冲区的指标，cancel()请求终止，
+    wait()同步等待结果，await result()在asyncio里等待结果
+    """
+
+    def __init__(self, target, config, callback=None):
+        """
+        构造方法，立即在后台线程里启动任务\n
+        :param target: 任务函数，run_crack或run_export
+        :param config: 任务配置
+        :param callback: 事件回调callback(event, data)，在后台线程里调用
+        """
+        self.config = config
+        self.callback = callback
+        self.snapshot = None
+        self.stats = None
+        self.stop_event = Event()
+        self.future = Future()
+        self.thread = Thread(target=self.run, args=(target, ), daemon=True)
+        self.thread.start()
+
+    def run(self, target):
+        """
+        后台线程的入口，把任务的返回值或异常交给future\n
+        :param target: 任务函数
+        :return:
+        """
+        try:
+            self.future.set_result(target(self.config, self.on_event, self.stop_event))
+        except BaseException as e:
+            self.future.set_exception(e)
+
+    def on_event(self, event: str, data):
+        """
+        记录最新进度并转发事件\n
+        :param event: 事件名称
+        :param data: 事件数据
+        :return:
+        """
+        if event == "progress":
+            self.snapshot = data
+        elif event == "pipeline":
+            self.stats = data
+        if self.callback is not None:
+            self.callback(event, data)
+
+    def progress(self) -> ProgressSnapshot:
+        """
+        最新的进度快照\n
+        :return: 进度快照，还没有进度时返回None
+        """
+        return self.snapshot
+
+    def pipeline(self) -> RingStats:
+        """
+        最新的任务缓冲区指标：积压深度、槽位数、生产者与消费者累计等待的秒数\n
+        :return: 缓冲区指标，还没有指标或者是导出任务时返回None
+        """
+        return self.stats
+
+    def cancel(self):
+        """
+        请求终止任务，任务会尽快结束，结果为None\n
+        :return:
+        """
+        self.stop_event.set()
+
+    def cancelled(self) -> bool:
+        """
+        是否已经请求终止\n
+        :return: 是否已经请求终止
+        """
+        return self.stop_event.is_set()
+
+    def done(self) -> bool:
+        """
+        任务是否已经结束\n
+        :return: 是否已经结束
+        """
+        return self.future.done()
+
+    def wait(self, timeout: float = None):
+        """
+        阻塞等待任务结束\n
+        :param timeout: 最长等待秒数，默认一直等待
+        :return: 任务的返回值，任务抛出的异常会重新抛出
+        """
+        return self.future.result(timeout)
+
+    def result(self):
+        """
+        在asyncio事件循环里等待任务结束，用法为await job.result()\n
+        :return: 可等待对象，结果为任务的返回值
+        """
+        return wrap_future(self.future)
+
+
+def start_crack(config: CrackConfig, callback=None, pool: WorkerPool = None) -> Job:
+    """
+    在后台启动一次破解\n
+    :param config: 破解配置
+    :param callback: 事件回调，参见run_crack
+    :param pool: 常驻的WorkerPool，不指定时任务自己临时创建进程池
+    :return: 任务句柄
+    """
+    return Job(partial(run_crack, pool=pool), config, callback)
+
+
+def start_export(config: ExportConfig, callback=None) -> Job:
+    """
+    在后台启动一次字典导出\n
+    :param config: 导出配置
+    :param callback: 事件回调，参见run_export
+    :return: 任务句柄
+    """
+    return Job(run_export, config, callback)
@@ -0,0 +1,140 @@
+# %% 导入包
+from os import path
+from mmap import mmap, ACCESS_READ
+
+
+# %% 声明全局变量
+# 按块扫描字典文件时每块的字节数
+CHUNK_SIZE = 1 << 20
+# 估计平均行长时抽样的字节数
+SAMPLE_SIZE = 1 << 16
+
+
+# %% 映射外部字典
+def open_dictionary(dict_path: str) -> mmap:
+    """
+    只读地把外部字典映射到内存，多个进程映射同一个文件时共用操作系统的页缓存\n
+    :param dict_path: 外部字典文件路径字符串
+    :return: mmap对象，空文件无法映射，返回None
+    """
+    if path.getsize(dict_path) == 0:
+        return None
+    with open(dict_path, "rb") as f:
+        return mmap(f.fileno(), 0, access=ACCESS_READ)
+
+
+def estimate_line_size(view: mmap) -> int:
+    """
+    从文件开头抽样估计平均每行的字节数\n
+    :param view: 映射的外部字典
+    :return: 平均每行的字节数，至少为1
+    """
+    sample = view[:SAMPLE_SIZE]
+    return max(len(sample) // max(sample.count(b"\n"), 1), 1)
+
+
+def split_ranges(view: mmap, start: int, stop: int, chunk_size: int) -> [range]:
+    """
+    把[start, stop)切成约chunk_size字节的区间，每个区间都在换行符之后结束，不会把一行切开\n
+    :param view: 映射的外部字典
+    :param start: 起点，必须是行首
+    :param stop: 终点（不含），必须是行首或文件末尾
+    :param chunk_size: 每个区间的大约字节数
+    :return: 由range对象组成的生成器
+    """
+    while start < stop:
+        end = min(start + max(chunk_size, 1), stop)
+        if end < stop:
+            newline = view.find(b"\n", end - 1, stop)
+            end = stop if newline < 0 else newline + 1
+        yield range(start, end)
+        start = end
+
+
+def read_lines(view: mmap, start: int, stop: int) -> [bytes]:
+    """
+    直接按字节读出[start, stop)里的每一行，去掉首尾空白，不解码\n
+    :param view: 映射的外部字典
+    :param start: 起点，必须是行首
+    :param stop: 终点（不含），必须是行首或文件末尾
+    :return: 每一行的字节串组成的列表
+    """
+    lines = view[start:stop].split(b"\n")
+    # 以换行符结尾时split会多出一个空串
+    if lines[-1] == b"":
+        lines.pop()
+    return [line.strip() for line in lines]
+
+
+def count_lines(view: mmap, ranges: [range], callback=None, stop_event=None) -> int:
+    """
+    按块统计这些字节区间里的行数，每块用bytes.count数换行符；每扫完一块回调一次按已扫描比例估计的总行数\n
+    :param view: 映射的外部字典
+    :param ranges: 按行对齐的字节区间
+    :param callback: 估计值回调callback(estimate)
+    :param stop_event: 终止事件，设置后放弃统计
+    :return: 行数，与消费者的计数方式一致，空行也算；被终止时返回None
+    """
+    total_bytes = sum(len(part) for part in ranges)
+    scanned = 0
+    lines = 0
+    for part in ranges:
+        for start in range(part.start, part.stop, CHUNK_SIZE):
+            if stop_event is not None and stop_event.is_set():
+                return None
+            end = min(start + CHUNK_SIZE, part.stop)
+            lines = lines + view[start:end].count(b"\n")
+            scanned = scanned + end - start
+            if callback is not None:
+                callback(lines * total_bytes // scanned)
+        # 文件最后一行可能没有换行符，也算一行
+        if len(part) and view[part.stop - 1] != ord("\n"):
+            lines = lines + 1
+    return lines
+
+
+# %% 在外部字典里定位
+def align_offset(dict_path: str, offset: int) -> int:
+    """
+    把字节偏移对齐到行首：正好在行首时不变，落在一行中间时移到下一行的行首\n
+    :param dict_path: 外部字典文件路径字符串
+    :param offset: 字节偏移
+    :return: 对齐后的字节偏移，不超过文件大小
+    """
+    size = path.getsize(dict_path)
+    if offset <= 0:
+        return 0
+    if offset >= size:
+        return size
+    with open(dict_path, "rb") as f:
+        f.seek(offset - 1)
+        f.readline()
+        return f.tell()
+
+
+def line_offset(dict_path: str, line: int) -> int:
+    """
+    找到第line行的行首字节偏移，按块统计换行符，不逐行解码\n
+    :param dict_path: 外部字典文件路径字符串
+    :param line: 行号，从1开始
+    :return: 字节偏移，行号超过总行数时返回文件大小
+    """
+    # 第line行之前有line-1个换行符
+    skip = line - 1
+    offset = 0
+    with open(dict_path, "rb") as f:
+        while skip > 0:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            count = chunk.count(b"\n")
+            if count < skip:
+                skip = skip - count
+                offset = offset + len(chunk)
+                continue
+            # 目标行从这一块里第skip个换行符之后开始
+            position = -1
+            for _ in range(skip):
+                position = chunk.index(b"\n", position + 1)
+            return offset + position + 1
+    return offset
@@ -0,0 +1,130 @@
+# %% 导入包
+from logging import getLogger, getLevelName, addLevelName, StreamHandler, Formatter, Logger, WARNING
+from os import environ
+
+
+# %% 声明全局变量
+# 本程序所有日志器的公共前缀
+LOGGER_NAME = "ZipCracker"
+# 逐个密码的热点事件用比DEBUG更低的级别记录，默认关闭
+TRACE = 5
+addLevelName(TRACE, "TRACE")
+# 日志级别与热点事件采样间隔的环境变量，子进程通过环境变量继承主进程的设置
+LEVEL_ENV = "ZIPCRACKER_LOG"
+SAMPLE_ENV = "ZIPCRACKER_LOG_SAMPLE"
+# 热点事件默认每1000条只记录1条
+SAMPLE_EVERY = 1000
+FORMAT = "%(asctime)s %(processName)s %(name)s %(levelname)s %(message)s"
+
+
+# %% 配置日志
+def parse_level(level) -> int:
+    """
+    把级别名称或数字转换成日志级别\n
+    :param level: 级别名称（如"DEBUG"、"TRACE"）或数字
+    :return: 日志级别，无法识别时返回WARNING
+    """
+    if type(level) == int:
+        return level
+    level = str(level).strip().upper()
+    if level.isdigit():
+        return int(level)
+    result = getLevelName(level)
+    return result if type(result) == int else WARNING
+
+
+def configure(level=None) -> Logger:
+    """
+    配置本程序的日志器，输出到标准错误；可以重复调用，只会添加一次处理器\n
+    :param level: 日志级别，不指定时读取环境变量ZIPCRACKER_LOG，默认WARNING
+    :return: 本程序的根日志器
+    """
+    if level is None:
+        level = environ.get(LEVEL_ENV, WARNING)
+    level = parse_level(level)
+    # 写回环境变量，之后启动的消费者进程按同样的级别配置
+    environ[LEVEL_ENV] = str(level)
+    logger = getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = StreamHandler()
+        handler.setFormatter(Formatter(FORMAT))
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
+
+
+# %% 定义一个类，分级记录事件，热点事件采样记录
+class EventLog(object):
+    """
+    分级事件日志类，包装标准库的日志器\n
+    热点事件只在TRACE级别开启时才记录，而且每sample_every条只记录1条；
+    热循环里应当先在循环外取一次tracing，关闭时每个密码只多一次布尔判断
+    """
+
+    def __init__(self, name: str, sample_every: int = None):
+        """
+        构造方法\n
+        :param name: 模块名，日志器名称为ZipCracker.模块名
+        :param sample_every: 热点事件的采样间隔，不指定时读取环境变量ZIPCRACKER_LOG_SAMPLE，默认1000
+        """
+        self.logger = getLogger(LOGGER_NAME + "." + name)
+        if sample_every is None:
+            sample_every = int(environ.get(SAMPLE_ENV, SAMPLE_EVERY))
+        self.sample_every = max(sample_every, 1)
+        self.sampled = 0
+
+    @property
+    def tracing(self) -> bool:
+        """
+        热点事件是否开启\n
+        :return: TRACE级别是否开启
+        """
+        return self.logger.isEnabledFor(TRACE)
+
+    def sample(self, message: str, *args):
+        """
+        记录热点事件，每sample_every条只记录第1条\n
+        :param message: 格式字符串
+        :param args: 格式参数
+        :return:
+        """
+        if self.sampled % self.sample_every == 0:
+            self.logger.log(TRACE, message, *args)
+        self.sampled = self.sampled + 1
+
+    def debug(self, message: str, *args):
+        """
+        记录调试事件\n
+        :param message: 格式字符串
+        :param args: 格式参数
+        :return:
+        """
+        self.logger.debug(message, *args)
+
+    def info(self, message: str, *args):
+        """
+        记录一般事件\n
+        :param message: 格式字符串
+        :param args: 格式参数
+        :return:
+        """
+        self.logger.info(message, *args)
+
+    def warning(self, message: str, *args):
+        """
+        记录警告\n
+        :param message: 格式字符串
+        :param args: 格式参数
+        :return:
+        """
+        self.logger.warning(message, *args)
+
+    def error(self, message: str, *args):
+        """
+        记录错误\n
+        :param message: 格式字符串
+        :param args: 格式参数
+        :return:
+        """
+        self.logger.error(message, *args)
@@ -1,15 +1,19 @@
 # %% 导入包
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
-from WriteDict import PasswordsWriter, PasswordsProducer
-from queue import Queue
+from PyQt5.QtCore import QThread, pyqtSignal
 from copy import deepcopy
-from string import digits, ascii_lowercase, ascii_uppercase, punctuation
+from CrackEngine import ExportConfig, start_export
+from EventLog import EventLog
+from KeySpace import generate_seed
+
+
+# %% 声明全局变量
+log = EventLog("ExportDict")
 
 
 # %% 定义一个类，用于管理导出字典的后台任务
 class ExportDict(QThread):
     """
-    管理导出字典的后台任务的类
+    管理导出字典的后台任务的类，只负责把CrackEngine的事件转换成Qt信号
     """
     # 定义一些常量
     EXPORT_COMPLETED = "导出密码完成!"
@@ -18,10 +22,11 @@ class ExportDict(QThread):
     producing_password_num = pyqtSignal(int)
     consuming_passwords = pyqtSignal(str)
     consuming_passwords_num = pyqtSignal(int)
+    progress = pyqtSignal(object)
 
     def __init__(
             self, name: str, seed_selection: (bool,), digit_range: range,
-            file_path: str, consumer_number: int, batch_size: int
+            file_path: str, batch_size: int
     ):
         """
         构造方法\n
@@ -29,7 +34,6 @@ class ExportDict(QThread):
         :param seed_selection: 最上面的几个复选框的勾选情况
         :param digit_range: 位数取值范围
         :param file_path: 文件路径字符串
-        :param consumer_number: 消费者数量
         :param batch_size: 密码元组长度
         """
         super(ExportDict, self).__init__()
@@ -37,11 +41,8 @@ class ExportDict(QThread):
         self.seed = ExportDict.generate_seed(seed_selection)
         self.digit_range = deepcopy(digit_range)
         self.file_path = file_path
-        self.consumer_number = consumer_number
         self.batch_size = batch_size
-        self.producer = None
-        self.producer: PasswordsProducer
-        self.consumers = []
+        self.job = None
 
     @staticmethod
     def generate_seed(seed_selection: (bool,)) -> str:
@@ -50,60 +51,41 @@ class ExportDict(QThread):
         :param seed_selection: 最上方的复选框勾选情况，由bool构成的数组
         :return: 由字符串构成的种子
         """
-        result = ""
-        if seed_selection[0]:
-            result = result + digits
-        if seed_selection[1]:
-            result = result + ascii_lowercase
-        if seed_selection[2]:
-            result = result + ascii_uppercase
-        if seed_selection[3]:
-            result = result + punctuation
-        return result
+        return generate_seed(seed_selection)
 
     def run(self):
         """
-        运行线程\n
+        运行线程，在后台启动导出任务并等待它结束\n
         :return:
         """
-        queue = Queue()
-        PasswordsProducer.password_num = 0
-        PasswordsWriter.passwords_num = 0
-        PasswordsWriter.CONSUMER_NUM = self.consumer_number
-        # 启动生产者
-        self.producer = PasswordsProducer(
-            "producer", queue, self.digit_range, self.seed, self.batch_size
-        )
-        self.producer.producing_password.connect(self.on_producing_password, type=Qt.DirectConnection)
-        self.producer.producing_password_num.connect(self.on_producing_password_num, type=Qt.DirectConnection)
-        self.producer.start()
-        # 启动消费者
-        self.consumers = []
-        for i in range(PasswordsWriter.CONSUMER_NUM):
-            consumer = PasswordsWriter("consumer " + str(i), queue, self.file_path)
-            consumer.consuming_passwords.connect(self.on_consuming_passwords, type=Qt.DirectConnection)
-            consumer.consuming_passwords_num.connect(self.on_consuming_passwords_num, type=Qt.DirectConnection)
-            self.consumers.append(consumer)
-            consumer.start()
-        # 等待生产者结束
-        self.producer.wait()
-        self.producer = None
-        self.producing_password_complete()
-        # 等待消费者结束
-        for consumer in self.consumers:
-            consumer.wait()
-        self.consumers.clear()
-        print("Export dict done")
-        self.consuming_passwords_complete()
+        self.job = start_export(ExportConfig(self.seed, self.digit_range, self.file_path, self.batch_size), self.on_event)
+        if self.job.wait() == self.get_passwords_count():
+            log.info("导出字典完成")
+            self.producing_password_complete()
+            self.consuming_passwords_complete()
 
     def stop(self):
         """
         终止线程\n
         :return:
         """
-        self.producer.stop()
-        for consumer in self.consumers:
-            consumer.stop()
+        if self.job is not None:
+            self.job.cancel()
+
+    def on_event(self, event: str, data):
+        """
+        把导出任务的事件转换成信号，在任务的后台线程里调用\n
+        :param event: 事件名称："progress"或"cancelled"
+        :param data: 事件数据：进度快照或None
+        :return:
+        """
+        if event != "progress" or data.current is None:
+            return
+        self.producing_password.emit("正在生成密码 " + data.current)
+        self.producing_password_num.emit(data.count)
+        self.consuming_passwords.emit("正在写入密码 " + data.current)
+        self.consuming_passwords_num.emit(data.count // self.batch_size)
+        self.progress.emit(data)
 
     def get_passwords_count(self) -> int:
         """
@@ -122,39 +104,6 @@ class ExportDict(QThread):
         """
         return self.get_passwords_count() // self.batch_size + 1
 
-    def on_producing_password(self, password: str):
-        """
-        处理生产者密码信号的槽函数\n
-        :return:
-        """
-        self.producing_password.emit("正在生成密码 " + password)
-
-    def on_producing_password_num(self, password_num: int):
-        """
-        处理生产者密码序数信号的槽函数\n
-        :param password_num: 密码序数
-        :return:
-        """
-        print("生成密码序号", password_num)
-        self.producing_password_num.emit(password_num)
-
-    def on_consuming_passwords(self, passwords: str):
-        """
-        处理消费者密码元组信号的槽函数\n
-        :param passwords: 由字符串组成的元组
-        :return:
-        """
-        self.consuming_passwords.emit("正在写入密码 " + ' '.join(passwords))
-
-    def on_consuming_passwords_num(self, passwords_num: int):
-        """
-        处理消费者密码元组序数的槽函数\n
-        :param passwords_num: 密码元组的序数
-        :return:
-        """
-        print("写入密码序号", passwords_num)
-        self.consuming_passwords_num.emit(passwords_num)
-
     def producing_password_complete(self):
         """
         生产者生成完密码后调用的函数\n
@@ -173,6 +122,6 @@ class ExportDict(QThread):
 
 
 if __name__ == "__main__":
-    my_thread = ExportDict("export dict thread", (True, False, False, False), range(2, 3), "text.txt", 6, 2)
+    my_thread = ExportDict("export dict thread", (True, False, False, False), range(2, 3), "text.txt", 2)
     my_thread.start()
     my_thread.wait()
\ No newline at end of file
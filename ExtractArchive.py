@@ -0,0 +1,311 @@
+# %% 导入包
+from queue import Queue
+from signal import signal as set_signal_handler, SIGINT, SIG_IGN
+from os import path, stat
+from zipfile import ZipFile, BadZipFile
+from zlib import error
+from KeySpace import KeySpace
+from SharedRing import SharedRing, SharedFlag, ByteRange, BatchDone
+from Dictionary import open_dictionary, read_lines
+from WordList import WordList
+from EventLog import EventLog, configure
+
+
+# %% 声明全局变量
+log = EventLog("ExtractArchive")
+# forkserver启动方式下预先在服务进程里导入的模块，之后fork出的消费者不必再导入
+PRELOAD_MODULES = ("ExtractArchive", "VerifyZip", "VerifyRar", "numpy")
+# 常驻进程池通过initializer传进来的任务缓冲区、结果缓冲区与终止标志
+worker_tasks = None
+worker_results = None
+worker_cancel = None
+# 消费者进程里缓存的校验器，常驻进程池里同一个压缩文件的后续任务直接复用，换了压缩文件才重新打开
+verifier_cache = {}
+# 消费者进程里映射的外部字典，同样按文件缓存
+dictionary_cache = {}
+
+
+# %% 消费者进程里运行的函数，不依赖PyQt5
+# 本模块是消费者进程的入口，只导入标准库和轻量模块，zip与rar的校验模块等用到时才导入
+def init_worker(tasks: SharedRing, results: SharedRing, cancel_event: SharedFlag):
+    """
+    进程池的initializer，保存进程间共享的缓冲区与终止标志，它们只能在创建进程时传递\n
+    Ctrl+C会发给整个进程组，消费者忽略SIGINT，由主进程设置终止标志让它们正常返回，否则主进程会一直等它们的结果\n
+    :param tasks: 生产者到消费者的任务缓冲区
+    :param results: 消费者到主进程的结果缓冲区
+    :param cancel_event: 进程间共享的终止标志
+    :return:
+    """
+    global worker_tasks, worker_results, worker_cancel
+    set_signal_handler(SIGINT, SIG_IGN)
+    configure()
+    worker_tasks = tasks
+    worker_results = results
+    worker_cancel = cancel_event
+
+
+def extract_shared(zipfile_path: str, extract_path: str, keyspace: KeySpace = None, dict_path: str = "") -> str:
+    """
+    常驻进程池里消费者的入口，通过共享内存缓冲区收发消息，参见extract_function\n
+    :param zipfile_path: 压缩文件路径字符串
+    :param extract_path: 解压路径字符串
+    :param keyspace: 密码空间
+    :param dict_path: 外部字典路径字符串
+    :return: 如果找到了密码，则返回密码；如果没找到密码，返回None
+    """
+    return extract_function(
+        worker_tasks, zipfile_path, extract_path, worker_results, keyspace, worker_cancel, dict_path
+    )
+
+
+def extract_function(
+        queue: Queue, zipfile_path: str, extract_path: str, emit_queue: Queue, keyspace: KeySpace = None,
+        cancel_event=None, dict_path: str = ""
+) -> str:
+    """
+    统一的解压函数，每个消费者进程运行一份，通过return返回找到的密码，通过emit_queue返回正在寻找的密码\n
+    压缩文件在进程里只打开、解析一次，之后每批密码、同一个压缩文件的后续任务都复用同一个校验器\n
+    :param queue: 连接生产者与消费者的队列
+    :param zipfile_path: 压缩文件路径字符串
+    :param extract_path: 解压路径字符串
+    :param emit_queue: 用于传递信号的队列：如果取出BatchDone，说明处理完了一批密码；如果取出range，说明正在寻找这个序号区间的密码；如果取出空元组，说明密码找遍了全不对；如果返回字符串，说明找到了密码就是字符串；如果取到了空字符串，说明压缩包密码为空
+    :param keyspace: 密码空间，KeySpace或紧凑字典的WordList，队列里取出range时用它在本地枚举密码
+    :param cancel_event: 进程间共享的终止标志，每个密码之前检查一次，设置后立即返回；找到密码时由本消费者设置
+    :param dict_path: 外部字典路径，队列里取出ByteRange时从这个文件的映射里直接读出那些行
+    :return: 如果找到了密码，则返回密码；如果没找到密码，返回None
+    """
+    # 消费者进程按环境变量里的级别配置日志
+    configure()
+    zip_mode = zipfile_path.lower().endswith(".zip")
+    verifier = get_verifier(zipfile_path)
+    while True:
+        signal = queue.get()
+        # 吃到了毒丸，跳出循环
+        if not signal:
+            # 告诉外界，吃到了毒丸
+            emit_queue.put(tuple())
+            break
+        # 任务已经结束（其他消费者找到了密码或者被终止），剩下的密码不必再试
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        # 紧凑字典按序号直接切出这个区间的密码，zip校验用字节串，rar用字符串
+        if type(signal) == range and type(keyspace) == WordList and zip_mode:
+            passwords = keyspace.iterate_bytes(signal.start, signal.stop)
+        elif type(signal) == range and type(keyspace) == WordList:
+            passwords = keyspace.iterate(signal.start, signal.stop)
+        # 取到序号区间，在本地枚举这个区间的密码
+        elif type(signal) == range and zip_mode:
+            passwords = verifier.search_range(keyspace, signal.start, signal.stop)
+        elif type(signal) == range:
+            passwords = keyspace.iterate(signal.start, signal.stop)
+        # 取到字节区间，直接从映射的字典里按字节切出这些行；zip校验本来就用字节串，rar要用字符串
+        elif type(signal) == ByteRange and zip_mode:
+            passwords = read_lines(get_dictionary(dict_path), signal.start, signal.stop)
+        elif type(signal) == ByteRange:
+            passwords = [
+                line.decode("utf8", "replace") for line in read_lines(get_dictionary(dict_path), signal.start, signal.stop)
+            ]
+        if zip_mode:
+            result = extract_zip(passwords, verifier, extract_path, cancel_event)
+        else:
+            result = extract_rar(passwords, verifier, extract_path, cancel_event)
+        if result is not None:
+            # 先让其他消费者停下，再回报结果；已经找到了密码，这批的进度不必再回报
+            if cancel_event is not None:
+                cancel_event.set()
+            try:
+                emit_queue.put(result)
+            except ValueError as e:
+                # 密码太长放不进结果缓冲区的槽位，主进程从返回值里取
+                log.warning("密码无法放入结果缓冲区，改由返回值回报：%s", e)
+            return result
+        if cancel_event is not None and cancel_event.is_set():
+            # 这批密码试到一半被终止，没试完的不计入进度
+            break
+        # 序号区间本身就很小，原样回报；字节区间只回报数量、最后一个密码和区间本身
+        if type(signal) == range:
+            emit_queue.put(signal)
+        else:
+            last = passwords[-1]
+            if type(last) == bytes:
+                last = last.decode("utf8", "replace")
+            emit_queue.put(BatchDone(len(passwords), last, signal.start, signal.stop))
+
+
+def get_verifier(zipfile_path: str):
+    """
+    取出缓存的校验器；压缩文件换了或者被修改过，就关闭旧的校验器再重新打开\n
+    :param zipfile_path: 压缩文件路径字符串
+    :return: zip文件返回ZipVerifier，rar文件返回RarVerifier
+    """
+    status = stat(zipfile_path)
+    key = (path.abspath(zipfile_path), status.st_size, status.st_mtime_ns)
+    if key not in verifier_cache:
+        for verifier in verifier_cache.values():
+            verifier.close()
+        verifier_cache.clear()
+        verifier_cache[key] = open_verifier(zipfile_path)
+    return verifier_cache[key]
+
+
+def get_dictionary(dict_path: str) -> "mmap":
+    """
+    取出缓存的字典映射；字典换了或者被修改过，就关闭旧的映射再重新映射\n
+    :param dict_path: 外部字典路径字符串
+    :return: mmap对象
+    """
+    status = stat(dict_path)
+    key = (path.abspath(dict_path), status.st_size, status.st_mtime_ns)
+    if key not in dictionary_cache:
+        for view in dictionary_cache.values():
+            view.close()
+        dictionary_cache.clear()
+        dictionary_cache[key] = open_dictionary(dict_path)
+    return dictionary_cache[key]
+
+
+def open_verifier(zipfile_path: str):
+    """
+    打开压缩文件并创建校验器\n
+    :param zipfile_path: 压缩文件路径字符串
+    :return: zip文件返回ZipVerifier，rar文件返回RarVerifier
+    """
+    if zipfile_path.lower().endswith(".zip"):
+        from VerifyZip import ZipVerifier
+        return ZipVerifier.from_path(zipfile_path)
+    elif zipfile_path.lower().endswith(".rar"):
+        from VerifyRar import RarVerifier
+        return RarVerifier(zipfile_path)
+
+
+def extract_zip(passwords: (str, ), verifier: "ZipVerifier", extract_path: str, cancel_event: SharedFlag = None) -> str:
+    """
+    解压zip文件，尝试密码时只在内存中校验，确认密码正确后才真正解压到磁盘\n
+    :param passwords: 密码组成的元组或可迭代对象，密码可以是字符串，也可以是字节串
+    :param verifier: 进程内复用的zip校验器
+    :param extract_path: 解压路径字符串
+    :param cancel_event: 进程间共享的终止标志，每个密码之前检查一次
+    :return: 如果找到了密码，返回密码字符串；如果没找到密码或者被终止，返回None
+    """
+    from VerifyZip import extract_zip_file
+    # 热点事件是否开启只判断一次，关闭时循环里没有任何日志开销
+    tracing = log.tracing
+    for password in passwords:
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        # 如果是空密码则跳过
+        if len(password) == 0:
+            continue
+        # 外部字典读出来的是字符串，内置遍历生成的已经是字节串
+        if type(password) == str:
+            password = bytes(password, "utf8")
+        try:
+            if not verifier.verify(password):
+                if tracing:
+                    log.sample("尝试密码 %s 失败", password)
+                continue
+            extract_zip_file(verifier.file, extract_path, password)
+        except (RuntimeError, BadZipFile, error):
+            if tracing:
+                log.sample("尝试密码 %s 失败", password)
+        except Exception as e:
+            log.error("尝试密码 %s 遇到未知错误 %s %s", password, type(e), e)
+        else:
+            log.info("尝试密码 %s 成功", password)
+            return password.decode("utf8", "replace")
+
+
+def extract_rar(passwords: (str, ), verifier: "RarVerifier", extract_path: str, cancel_event: SharedFlag = None) -> str:
+    """
+    解压rar文件，能够原生校验密码时不需要UnRAR动态库，确认密码正确后才真正解压到磁盘\n
+    :param passwords: 密码组成的元组或可迭代对象
+    :param verifier: 进程内复用的rar校验器
+    :param extract_path: 解压路径字符串
+    :param cancel_event: 进程间共享的终止标志，每个密码之前检查一次
+    :return: 如果找到了密码，返回密码字符串；如果没找到密码或者被终止，返回None
+    """
+    from VerifyRar import BadRarFile, extract_rar_file
+    # 热点事件是否开启只判断一次，关闭时循环里没有任何日志开销
+    tracing = log.tracing
+    if verifier.native:
+        for password in passwords:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            # 如果是空密码则跳过
+            if len(password) == 0:
+                continue
+            if not verifier.verify(password):
+                if tracing:
+                    log.sample("尝试密码 %s 失败", password)
+                continue
+            log.info("尝试密码 %s 成功", password)
+            extract_rar_file(verifier.rarfile_path, extract_path, password)
+            return password
+        return None
+    file = verifier.open_unrar()
+    if file is None:
+        log.error("找不到UnRAR动态库，且无法原生校验这个rar文件的密码")
+        return None
+    for password in passwords:
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        # 如果是空密码则跳过
+        if len(password) == 0:
+            continue
+        try:
+            # 尝试密码时只在内存中读取校验代价最小的成员，确认密码正确后再全部解压
+            if verifier.unrar_target is not None:
+                file.read(verifier.unrar_target, pwd=password)
+            file.extractall(path=extract_path, members=None, pwd=password)
+        except (RuntimeError, BadRarFile):
+            if tracing:
+                log.sample("尝试密码 %s 失败", password)
+        except Exception as e:
+            log.error("尝试密码 %s 遇到未知错误 %s %s", password, type(e), e)
+        else:
+            log.info("尝试密码 %s 成功", password)
+            return password
+
+
+def extract_no_password(zipfile_path: str, extract_path: str) -> bool:
+    """
+    尝试用空密码解压\n
+    :param zipfile_path: 压缩文件路径字符串
+    :param extract_path: 解压路径字符串
+    :return: 是否能解压成功
+    """
+    if zipfile_path.lower().endswith(".zip"):
+        from VerifyZip import ZipVerifier, extract_zip_file
+        with ZipFile(zipfile_path) as file:
+            try:
+                if not ZipVerifier(file).verify(b""):
+                    return False
+                extract_zip_file(file, extract_path, None)
+            except RuntimeError:
+                return False
+            except BadZipFile:
+                return False
+            except error:
+                return False
+            except Exception as e:
+                log.error("遇到未知错误 %s %s", type(e), e)
+            else:
+                return True
+    elif zipfile_path.lower().endswith(".rar"):
+        from VerifyRar import RarFile, RarVerifier
+        # 能够原生校验说明压缩包带密码，不可能是空密码
+        if RarVerifier(zipfile_path).native or RarFile is None:
+            return False
+        with RarFile(zipfile_path) as file:
+            try:
+                file.extractall(path=extract_path, members=None, pwd=None)
+            except RuntimeError:
+                return False
+            except BadZipFile:
+                return False
+            except error:
+                return False
+            except Exception as e:
+                log.error("遇到未知错误 %s %s", type(e), e)
+            else:
+                return True
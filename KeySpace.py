@@ -0,0 +1,246 @@
+# %% 导入包
+from bisect import bisect_right
+from string import digits, ascii_lowercase, ascii_uppercase, punctuation
+
+
+# %% 声明全局变量
+# 可选的字符集，顺序与界面上的复选框一致
+CHARSETS = (("digits", digits), ("lowercase", ascii_lowercase), ("uppercase", ascii_uppercase), ("punctuation", punctuation))
+
+
+# %% 生成种子
+def generate_seed(seed_selection: (bool,)) -> str:
+    """
+    根据字符集选择生成种子\n
+    :param seed_selection: 数字、小写字母、大写字母、标点是否选中，由bool构成的数组
+    :return: 由字符串构成的种子
+    """
+    result = ""
+    for selected, (_, charset) in zip(seed_selection, CHARSETS):
+        if selected:
+            result = result + charset
+    return result
+
+
+# %% 定义一个类，把序号和密码互相映射
+class KeySpace(object):
+    """
+    密码空间类，把全部遍历密码看成一个按序号排列的数组\n
+    位数从小到大排列，同一位数内部按种子顺序做混合进制计数，顺序与itertools.product一致
+    """
+
+    def __init__(self, seed: str, digit_range: range):
+        """
+        构造方法\n
+        :param seed: 字符串对象，密码种子
+        :param digit_range: range类对象，位数取值范围
+        """
+        self.seed = seed
+        self.digit_range = range(digit_range.start, digit_range.stop, digit_range.step)
+        # 每种位数的起始序号，用于二分查找序号落在哪个位数里
+        self.starts = []
+        self.size = 0
+        for digit in self.digit_range:
+            self.starts.append(self.size)
+            self.size = self.size + len(seed) ** digit
+        self.positions = {char: i for i, char in enumerate(seed)}
+        # 种子全是ASCII字符时，每个字符正好一个字节，可以直接在字节数组上逐位进位
+        self.single_byte = all(ord(char) < 128 for char in seed)
+
+    def __len__(self) -> int:
+        """
+        密码总数\n
+        :return: 密码总数
+        """
+        return self.size
+
+    def __getitem__(self, index: int) -> str:
+        """
+        根据序号取密码\n
+        :param index: 密码序号，从0开始
+        :return: 密码字符串
+        """
+        digit, offset = self.locate(index)
+        return ''.join(self.seed[i] for i in self.to_digits(offset, digit))
+
+    def __getstate__(self) -> dict:
+        """
+        序列化时只传种子和位数，其余属性在子进程重新计算，减少进程间通信的数据量\n
+        :return: 状态字典
+        """
+        return {"seed": self.seed, "digit_range": self.digit_range}
+
+    def __setstate__(self, state: dict):
+        """
+        反序列化\n
+        :param state: 状态字典
+        :return:
+        """
+        self.__init__(state["seed"], state["digit_range"])
+
+    def locate(self, index: int) -> (int, int):
+        """
+        计算序号对应的位数以及在该位数内部的偏移\n
+        :param index: 密码序号
+        :return: (位数, 偏移)
+        """
+        if index < 0:
+            index = index + self.size
+        if not 0 <= index < self.size:
+            raise IndexError("密码序号 %d 超出范围 [0, %d)" % (index, self.size))
+        i = bisect_right(self.starts, index) - 1
+        return self.digit_range[i], index - self.starts[i]
+
+    def to_digits(self, offset: int, digit: int) -> [int]:
+        """
+        把位数内部的偏移拆成每一位字符在种子中的下标，高位在前\n
+        :param offset: 偏移
+        :param digit: 位数
+        :return: 下标列表
+        """
+        base = len(self.seed)
+        result = [0] * digit
+        for pos in range(digit - 1, -1, -1):
+            offset, result[pos] = divmod(offset, base)
+        return result
+
+    def index(self, password: str) -> int:
+        """
+        根据密码反查序号\n
+        :param password: 密码字符串
+        :return: 密码序号
+        """
+        digit = len(password)
+        if digit not in self.digit_range:
+            raise ValueError("密码 %s 的位数不在取值范围内" % password)
+        offset = 0
+        for char in password:
+            if char not in self.positions:
+                raise ValueError("密码 %s 含有种子以外的字符 %s" % (password, char))
+            offset = offset * len(self.seed) + self.positions[char]
+        return self.starts[self.digit_range.index(digit)] + offset
+
+    def iterate(self, start: int, end: int) -> [str]:
+        """
+        枚举序号在[start, end)之间的密码，像里程表一样逐位进位，不从头生成\n
+        :param start: 起始序号
+        :param end: 结束序号（不含）
+        :return: 枚举密码的生成器
+        """
+        end = min(end, self.size)
+        if start >= end:
+            return
+        base = len(self.seed)
+        digit, offset = self.locate(start)
+        indices = self.to_digits(offset, digit)
+        chars = [self.seed[i] for i in indices]
+        for _ in range(end - start):
+            yield ''.join(chars)
+            pos = digit - 1
+            while pos >= 0:
+                indices[pos] = indices[pos] + 1
+                if indices[pos] < base:
+                    chars[pos] = self.seed[indices[pos]]
+                    break
+                indices[pos] = 0
+                chars[pos] = self.seed[0]
+                pos = pos - 1
+            else:
+                # 当前位数已经走完，切换到下一个位数
+                i = self.digit_range.index(digit) + 1
+                if i == len(self.digit_range):
+                    return
+                digit = self.digit_range[i]
+                indices = [0] * digit
+                chars = [self.seed[0]] * digit
+
+    def iterate_bytes(self, start: int, end: int) -> [bytes]:
+        """
+        枚举序号在[start, end)之间的密码，直接生成UTF-8字节串，不经过字符串\n
+        :param start: 起始序号
+        :param end: 结束序号（不含）
+        :return: 枚举密码字节串的生成器
+        """
+        for buffer in self.odometer(start, end):
+            yield bytes(buffer)
+
+    def pack(self, start: int, end: int, separator: bytes = b"\n") -> bytes:
+        """
+        把序号在[start, end)之间的密码打包成一个字节串，每个密码后面跟一个分隔符\n
+        :param start: 起始序号
+        :param end: 结束序号（不含）
+        :param separator: 分隔符
+        :return: 打包后的字节串
+        """
+        if not self.single_byte:
+            return b"".join(buffer + separator for buffer in self.odometer(start, end))
+        end = min(end, self.size)
+        base = len(self.seed)
+        codes = self.seed.encode("ascii")
+        tails = [bytes((code, )) + separator for code in codes]
+        result = bytearray()
+        # 前缀相同的一组密码只有最后一位不同，用前缀作连接符一次拼出整组
+        while start < end:
+            digit, offset = self.locate(start)
+            if digit == 0:
+                result += separator
+                start = start + 1
+                continue
+            last = offset % base
+            count = min(base - last, end - start)
+            prefix = bytes(codes[i] for i in self.to_digits(offset // base, digit - 1))
+            result += prefix.join([b""] + tails[last:last + count])
+            start = start + count
+        return bytes(result)
+
+    def odometer(self, start: int, end: int) -> [bytearray]:
+        """
+        在预先分配的字节数组上像里程表一样逐位进位，每次只改变化的那几个字节\n
+        每次产出的都是同一个字节数组，使用者需要自己复制\n
+        :param start: 起始序号
+        :param end: 结束序号（不含）
+        :return: 字节数组的生成器
+        """
+        if not self.single_byte:
+            for password in self.iterate(start, end):
+                yield bytearray(password.encode("utf8"))
+            return
+        end = min(end, self.size)
+        if start >= end:
+            return
+        base = len(self.seed)
+        codes = self.seed.encode("ascii")
+        digit, offset = self.locate(start)
+        indices = self.to_digits(offset, digit)
+        buffer = bytearray(codes[i] for i in indices)
+        for _ in range(end - start):
+            yield buffer
+            pos = digit - 1
+            while pos >= 0:
+                indices[pos] = indices[pos] + 1
+                if indices[pos] < base:
+                    buffer[pos] = codes[indices[pos]]
+                    break
+                indices[pos] = 0
+                buffer[pos] = codes[0]
+                pos = pos - 1
+            else:
+                # 当前位数已经走完，切换到下一个位数
+                i = self.digit_range.index(digit) + 1
+                if i == len(self.digit_range):
+                    return
+                digit = self.digit_range[i]
+                indices = [0] * digit
+                buffer = bytearray(codes[:1] * digit)
+
+    def split(self, batch_size: int, start: int = 0, end: int = None) -> [range]:
+        """
+        把密码空间的[start, end)部分切成若干区间\n
+        :param batch_size: 每个区间的密码数量
+        :param start: 起始序号，默认从头开始
+        :param end: 结束序号（不含），默认到密码空间末尾
+        :return: 由range对象组成的生成器
+        """
+        end = self.size if end is None else min(end, self.size)
+        for batch_start in range(start, end, batch_size):
+            yield range(batch_start, min(batch_start + batch_size, end))
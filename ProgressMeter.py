@@ -0,0 +1,83 @@
+# %% 导入包
+from time import monotonic
+from collections import namedtuple
+
+
+# %% 定义进度快照
+# count: 已处理的密码数量；total: 密码总数，未知时为0；current: 当前处理到的密码或批次；
+# rate: 每秒处理的密码数量；eta: 预计剩余秒数，未知时为None
+ProgressSnapshot = namedtuple("ProgressSnapshot", ["count", "total", "current", "rate", "eta"])
+
+
+# %% 定义一个类，汇总进度并限制发布频率
+class ProgressMeter(object):
+    """
+    进度汇总类，热循环里只累加计数，每隔固定时间才生成一次快照，避免每个密码都发射一次信号
+    """
+    # 定义一些常量
+    INTERVAL = 0.1
+
+    def __init__(self, total: int = 0, interval: float = INTERVAL, count: int = 0):
+        """
+        构造方法\n
+        :param total: 密码总数，未知时为0
+        :param interval: 两次快照之间的最短间隔秒数，默认0.1秒即10Hz
+        :param count: 之前已经处理过的密码数量，从检查点恢复时不计入速度
+        """
+        self.total = total
+        self.interval = interval
+        self.count = count
+        self.current = None
+        self.start_time = self.last_time = monotonic()
+        self.last_count = count
+        self.rate = 0.0
+
+    def set_total(self, total: int):
+        """
+        更新密码总数，总数在后台统计、逐步修正时调用\n
+        :param total: 密码总数
+        :return:
+        """
+        self.total = total
+
+    def add(self, count: int, current=None) -> ProgressSnapshot:
+        """
+        累加已处理的密码数量\n
+        :param count: 新处理的密码数量
+        :param current: 当前处理到的密码或批次
+        :return: 到了发布时间返回快照，否则返回None
+        """
+        return self.update(self.count + count, current)
+
+    def update(self, count: int, current=None) -> ProgressSnapshot:
+        """
+        设置已处理的密码数量\n
+        :param count: 已处理的密码总数
+        :param current: 当前处理到的密码或批次
+        :return: 到了发布时间返回快照，否则返回None
+        """
+        self.count = count
+        self.current = current
+        now = monotonic()
+        if now - self.last_time < self.interval:
+            return None
+        return self.snapshot(now)
+
+    def snapshot(self, now: float = None) -> ProgressSnapshot:
+        """
+        立即生成一次快照，任务结束时用它把最终进度发布出去\n
+        :param now: 当前时间，默认重新取
+        :return: 快照
+        """
+        if now is None:
+            now = monotonic()
+        if now > self.last_time:
+            # 速度按最近一个间隔计算，再和之前的速度做平滑，避免跳动
+            rate = (self.count - self.last_count) / (now - self.last_time)
+            self.rate = rate if self.rate == 0 else self.rate * 0.7 + rate * 0.3
+        self.last_time = now
+        self.last_count = self.count
+        eta = None
+        if self.total and self.rate > 0:
+            eta = max(self.total - self.count, 0) / self.rate
+        return ProgressSnapshot(self.count, self.total, self.current, self.rate, eta)
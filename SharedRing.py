@@ -0,0 +1,271 @@
+# %% 导入包
+from multiprocessing.shared_memory import SharedMemory
+from collections import namedtuple
+from queue import Empty, Full
+from struct import Struct
+from time import monotonic
+
+
+# %% 声明全局变量
+# 槽位头部：消息类型1字节，负载长度4字节
+SLOT_HEADER = Struct("<BI")
+# 消息类型：毒丸（空元组）、序号区间、字符串、一批密码的处理结果、外部字典的字节区间（ByteRange）
+KIND_PILL = 0
+KIND_RANGE = 1
+KIND_TEXT = 3
+KIND_DONE = 4
+KIND_BYTES = 5
+# 序号区间与字节区间的负载：起点和终点
+RANGE_STRUCT = Struct("<qq")
+# 一批密码的处理结果的负载：密码数量和字节区间，后面是最后一个密码的UTF-8字节
+DONE_STRUCT = Struct("<qqq")
+# 最后一个密码只用于展示进度，最多保留这么多字节，字典里再长的行也放得进结果缓冲区的槽位
+LAST_SIZE = 256
+# 外部字典文件里按行对齐的字节区间，消费者自己映射字典文件读出这些行，密码本身不经过缓冲区
+ByteRange = namedtuple("ByteRange", ["start", "stop"])
+# 消费者处理完一个字节区间后回报的结果，只有数量、最后一个密码和字节区间，不把整批密码传回去
+BatchDone = namedtuple("BatchDone", ["count", "last", "start", "stop"])
+# 缓冲区的运行指标：depth为当前积压的消息数，capacity为允许积压的消息数，
+# put_wait为生产者累计等待空位的秒数，get_wait为消费者累计等待消息的秒数
+RingStats = namedtuple("RingStats", ["depth", "capacity", "put_wait", "get_wait"])
+
+
+# %% 消息编码
+def encode(message) -> (int, bytes):
+    """
+    把消息编码成类型和负载，不经过pickle\n
+    :param message: 空元组、range、ByteRange、字符串或BatchDone
+    :return: (消息类型, 负载字节串)
+    """
+    if type(message) == range:
+        return KIND_RANGE, RANGE_STRUCT.pack(message.start, message.stop)
+    if type(message) == ByteRange:
+        return KIND_BYTES, RANGE_STRUCT.pack(message.start, message.stop)
+    if type(message) == str:
+        return KIND_TEXT, message.encode("utf8")
+    if type(message) == BatchDone:
+        return KIND_DONE, DONE_STRUCT.pack(message.count, message.start, message.stop) + message.last.encode("utf8")[:LAST_SIZE]
+    if len(message) == 0:
+        return KIND_PILL, b""
+    raise TypeError("不支持的消息类型 %s" % type(message))
+
+
+def decode(kind: int, payload: bytes):
+    """
+    把类型和负载还原成消息\n
+    :param kind: 消息类型
+    :param payload: 负载字节串
+    :return: 消息
+    """
+    if kind == KIND_RANGE:
+        return range(*RANGE_STRUCT.unpack(payload))
+    if kind == KIND_BYTES:
+        return ByteRange(*RANGE_STRUCT.unpack(payload))
+    if kind == KIND_TEXT:
+        return payload.decode("utf8")
+    if kind == KIND_DONE:
+        count, start, stop = DONE_STRUCT.unpack_from(payload)
+        # 截断时可能切开一个多字节字符，丢掉残缺的部分
+        return BatchDone(count, payload[DONE_STRUCT.size:].decode("utf8", "ignore"), start, stop)
+    return tuple()
+
+
+# %% 定义一个类，用共享内存在进程间传递消息
+class SharedRing(object):
+    """
+    共享内存环形缓冲区，用法与multiprocessing.Queue相同：put放入消息，get取出消息，可以有多个生产者和多个消费者\n
+    消息带着类型和长度直接写进共享内存的槽位，不经过pickle，也不经过Manager服务进程中转；
+    free信号量记录空闲槽位，filled信号量记录已写入的槽位，槽位写满时put阻塞\n
+    信号量只能在创建子进程时传递，所以只能作为进程池initializer的参数传给消费者
+    """
+
+    def __init__(self, context, slots: int, slot_size: int):
+        """
+        构造方法，创建共享内存和信号量\n
+        :param context: multiprocessing上下文
+        :param slots: 槽位数量
+        :param slot_size: 每个槽位的字节数，包括槽位头部
+        """
+        self.slots = slots
+        self.slot_size = slot_size
+        # 允许积压的消息数，多出来的空位由创建者占住，参见set_depth
+        self.depth = slots
+        self.memory = SharedMemory(create=True, size=slots * slot_size)
+        self.name = self.memory.name
+        self.owner = True
+        self.free = context.Semaphore(slots)
+        self.filled = context.Semaphore(0)
+        self.put_lock = context.Lock()
+        self.get_lock = context.Lock()
+        # 下一个要写入和下一个要读取的槽位，分别由put_lock和get_lock保护
+        self.head = context.RawValue("q", 0)
+        self.tail = context.RawValue("q", 0)
+        # 运行指标：累计写入、读出的消息数，以及生产者、消费者累计等待的秒数
+        self.puts = context.RawValue("q", 0)
+        self.gets = context.RawValue("q", 0)
+        self.put_wait = context.RawValue("d", 0.0)
+        self.get_wait = context.RawValue("d", 0.0)
+
+    def __getstate__(self) -> dict:
+        """
+        序列化时不传共享内存对象本身，子进程按名称重新连接\n
+        :return: 状态字典
+        """
+        state = self.__dict__.copy()
+        del state["memory"]
+        return state
+
+    def __setstate__(self, state: dict):
+        """
+        反序列化，按名称连接共享内存\n
+        :param state: 状态字典
+        :return:
+        """
+        self.__dict__.update(state)
+        self.memory = SharedMemory(name=self.name)
+        self.owner = False
+
+    def put(self, message, block: bool = True, timeout: float = None):
+        """
+        放入一条消息\n
+        :param message: 空元组、range、ByteRange、字符串或BatchDone
+        :param block: 没有空闲槽位时是否等待
+        :param timeout: 最长等待秒数
+        :return:
+        """
+        kind, payload = encode(message)
+        if SLOT_HEADER.size + len(payload) > self.slot_size:
+            raise ValueError("消息长度 %d 超过槽位大小 %d" % (len(payload), self.slot_size))
+        start_time = monotonic()
+        acquired = self.free.acquire(block, timeout)
+        waited = monotonic() - start_time
+        if not acquired:
+            with self.put_lock:
+                self.put_wait.value = self.put_wait.value + waited
+            raise Full
+        with self.put_lock:
+            self.put_wait.value = self.put_wait.value + waited
+            self.puts.value = self.puts.value + 1
+            offset = self.head.value * self.slot_size
+            self.head.value = (self.head.value + 1) % self.slots
+            SLOT_HEADER.pack_into(self.memory.buf, offset, kind, len(payload))
+            start = offset + SLOT_HEADER.size
+            self.memory.buf[start:start + len(payload)] = payload
+        self.filled.release()
+
+    def get(self, block: bool = True, timeout: float = None):
+        """
+        取出一条消息\n
+        :param block: 没有消息时是否等待
+        :param timeout: 最长等待秒数
+        :return: 消息
+        """
+        start_time = monotonic()
+        acquired = self.filled.acquire(block, timeout)
+        waited = monotonic() - start_time
+        if not acquired:
+            with self.get_lock:
+                self.get_wait.value = self.get_wait.value + waited
+            raise Empty
+        with self.get_lock:
+            self.get_wait.value = self.get_wait.value + waited
+            self.gets.value = self.gets.value + 1
+            offset = self.tail.value * self.slot_size
+            self.tail.value = (self.tail.value + 1) % self.slots
+            kind, length = SLOT_HEADER.unpack_from(self.memory.buf, offset)
+            start = offset + SLOT_HEADER.size
+            payload = bytes(self.memory.buf[start:start + length])
+        self.free.release()
+        return decode(kind, payload)
+
+    def stats(self) -> RingStats:
+        """
+        读取运行指标，不加锁，只用于展示\n
+        :return: 运行指标
+        """
+        return RingStats(self.puts.value - self.gets.value, self.depth, self.put_wait.value, self.get_wait.value)
+
+    def set_depth(self, depth: int):
+        """
+        限制允许积压的消息数，不超过槽位数：多出来的空位由调用者从free信号量里占住，put看到的缓冲区就变浅了；
+        只能在缓冲区为空、没有生产者时调用\n
+        :param depth: 允许积压的消息数
+        :return:
+        """
+        depth = min(max(depth, 1), self.slots)
+        while self.depth < depth:
+            self.free.release()
+            self.depth = self.depth + 1
+        while self.depth > depth:
+            self.free.acquire()
+            self.depth = self.depth - 1
+
+    def reset_stats(self):
+        """
+        清零累计等待时间，每个任务开始时调用\n
+        :return:
+        """
+        with self.put_lock:
+            self.put_wait.value = 0.0
+        with self.get_lock:
+            self.get_wait.value = 0.0
+
+    def clear(self) -> int:
+        """
+        丢弃缓冲区里现有的全部消息\n
+        :return: 丢弃的消息数量
+        """
+        count = 0
+        while True:
+            try:
+                self.get(False)
+            except Empty:
+                return count
+            count = count + 1
+
+    def close(self):
+        """
+        断开共享内存，创建者同时释放共享内存\n
+        :return:
+        """
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+# %% 定义一个类，用共享内存里的一个字节做进程间的标志
+class SharedFlag(object):
+    """
+    进程间共享的标志，接口与multiprocessing.Event的set、clear、is_set相同\n
+    multiprocessing.Event每次is_set都要获取锁，约1微秒，消费者逐个密码检查时开销明显；
+    这里只读写共享内存里的一个字节，不加锁，不支持wait\n
+    与SharedRing一样只能在创建子进程时传递
+    """
+
+    def __init__(self, context):
+        """
+        构造方法\n
+        :param context: multiprocessing上下文
+        """
+        self.value = context.RawValue("b", 0)
+
+    def set(self):
+        """
+        设置标志\n
+        :return:
+        """
+        self.value.value = 1
+
+    def clear(self):
+        """
+        清除标志\n
+        :return:
+        """
+        self.value.value = 0
+
+    def is_set(self) -> bool:
+        """
+        标志是否已经设置\n
+        :return: 是否已经设置
+        """
+        return self.value.value == 1
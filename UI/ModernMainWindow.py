@@ -16,6 +16,7 @@ from PyQt5.QtCore import Qt, pyqtSlot, QFileInfo, QDir, QTime, QPropertyAnimatio
 from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QPixmap, QPainter, QBrush, QLinearGradient
 from ExportDict import ExportDict
 from CrackPassword import CrackPassword
+from CrackEngine import WorkerPool
 
 # 统一暗色主题下的组框样式（标题与边框融为一体）
 UNIFIED_GROUPBOX_STYLE_DARK = """
@@ -92,7 +93,7 @@ class ModernMainWindow(QMainWindow):
     SUPPORTED_FILE_TYPES = ["zip", "rar", "7z"]
     UNSUPPORTED_FILE_TYPES = "不支持的文件格式，目前仅支持%s文件" % ', '.join(SUPPORTED_FILE_TYPES)
     EXPORT_COMPLETED = ExportDict.EXPORT_COMPLETED
-    FILE_FILTER_TXT = "文本文件 (*.txt);;全部文件 (*)"
+    FILE_FILTER_TXT = "字典文件 (*.txt *.zcwl);;文本文件 (*.txt);;紧凑字典 (*.zcwl);;全部文件 (*)"
     FILE_FILTER_ZIP = "压缩文件 (*.zip;*.rar;*.7z);;ZIP压缩文件 (*.zip);;RAR压缩文件 (*.rar);;7Z压缩文件 (*.7z);;全部文件 (*)"
     START_CRACK = "开始遍历"
     STOP_CRACK = "停止遍历"
@@ -108,6 +109,8 @@ class ModernMainWindow(QMainWindow):
         # 初始化变量
         self.export_dict_thread = None
         self.password_cracker = None
+        # 常驻的消费者进程池，第一次破解时启动，之后进程数不变的破解任务都复用，窗口关闭时才关闭
+        self.worker_pool = None
         
         # 设置主题样式
         self.setup_theme()
@@ -503,10 +506,11 @@ class ModernMainWindow(QMainWindow):
                 
                 self.export_dict_thread = ExportDict(
                     "export_dict", seed_selection, digit_range,
-                    file_path, self.core_num.intValue(), self.batch_size.intValue()
+                    file_path, self.batch_size.intValue()
                 )
                 self.export_dict_thread.producing_password.connect(self.on_exporting_dict)
                 self.export_dict_thread.consuming_passwords.connect(self.on_exporting_dict)
+                self.export_dict_thread.progress.connect(self.on_progress_snapshot)
                 self.export_dict_thread.start()
                 self.button_export.setText(self.STOP_EXPORT)
                 self.log_message(f"开始导出字典到: {file_path}")
@@ -550,6 +554,14 @@ class ModernMainWindow(QMainWindow):
         """遍历密码数量更新"""
         self.progress_crack.setValue(passwords_num)
 
+    @pyqtSlot(object)
+    def on_progress_snapshot(self, snapshot):
+        """进度快照更新：已处理数量、速度与预计剩余时间"""
+        message = "已处理 %d 个密码，%.0f 个/秒" % (snapshot.count, snapshot.rate)
+        if snapshot.eta is not None:
+            message = message + "，预计剩余 %s" % QTime(0, 0).addSecs(int(min(snapshot.eta, 86399))).toString("hh:mm:ss")
+        self.statusbar.showMessage(message)
+
     @pyqtSlot(int)
     def on_crack_progress_changed(self, progress: int):
         """遍历进度变化"""
@@ -587,6 +599,19 @@ class ModernMainWindow(QMainWindow):
             self.dict_path.setText(file_path)
         return file_path
 
+    def closeEvent(self, event):
+        """关闭窗口时停止正在运行的任务并关闭进程池"""
+        if self.password_cracker is not None:
+            self.password_cracker.stop()
+            self.password_cracker.wait()
+        if self.export_dict_thread is not None:
+            self.export_dict_thread.stop()
+            self.export_dict_thread.wait()
+        if self.worker_pool is not None:
+            self.worker_pool.terminate()
+            self.worker_pool = None
+        super().closeEvent(event)
+
     @pyqtSlot()
     def on_crack_password(self):
         """开始遍历密码"""
@@ -620,15 +645,23 @@ class ModernMainWindow(QMainWindow):
             extract_path = self.get_extract_path()
             
             if zipfile_path and extract_path:
+                # 进程数跟随CPU滑块，滑块改了就关闭空闲的旧进程池，按新的进程数重建
+                if self.worker_pool is not None and self.worker_pool.processes != consumer_number:
+                    self.worker_pool.terminate()
+                    self.worker_pool = None
+                if self.worker_pool is None:
+                    self.worker_pool = WorkerPool(consumer_number)
                 self.password_cracker = CrackPassword(
                     "password_crack", seed_selection, digit_range,
                     dict_path, consumer_number, batch_size, dict_source,
-                    zipfile_path, extract_path
+                    zipfile_path, extract_path, self.worker_pool
                 )
                 self.progress_crack.setMaximum(self.password_cracker.get_batch_count() + 1)
+                self.password_cracker.batch_count_changed.connect(self.progress_crack.setMaximum)
                 self.password_cracker.consuming_passwords_num.connect(self.on_cracking_passwords_num)
                 self.password_cracker.producing_password.connect(self.on_cracking_passwords)
                 self.password_cracker.consuming_passwords.connect(self.on_cracking_passwords)
+                self.password_cracker.progress.connect(self.on_progress_snapshot)
                 self.password_cracker.start()
                 self.button_crack.setText(self.STOP_CRACK)
                 if dict_source == 1:
@@ -0,0 +1,390 @@
+# %% 导入包
+from struct import unpack
+from zlib import crc32
+from hashlib import pbkdf2_hmac, sha1, sha256
+from AesCipher import AesDecryptor, BLOCK_SIZE
+from EventLog import EventLog
+try:
+    from unrar.rarfile import RarFile, BadRarFile
+except (ImportError, LookupError):
+    # 没有安装unrar或者找不到UnRAR动态库，只能用本模块校验密码
+    RarFile = None
+    BadRarFile = RuntimeError
+
+
+# %% 声明全局变量
+log = EventLog("VerifyRar")
+RAR5_SIGNATURE = b"Rar!\x1a\x07\x01\x00"
+RAR3_SIGNATURE = b"Rar!\x1a\x07\x00"
+# RAR5的块类型
+RAR5_HEAD_FILE = 2
+RAR5_HEAD_CRYPT = 4
+RAR5_HEAD_END = 5
+# RAR5额外区域中文件加密记录的类型
+RAR5_EXTRA_CRYPT = 1
+# RAR5的密码校验值长度、校验值的校验和长度
+RAR5_CHECK_SIZE = 8
+RAR5_CHECKSUM_SIZE = 4
+# RAR3的块类型
+RAR3_HEAD_MAIN = 0x73
+RAR3_HEAD_FILE = 0x74
+RAR3_HEAD_END = 0x7B
+# RAR3的块标志
+RAR3_MAIN_PASSWORD = 0x0080
+RAR3_FILE_SPLIT = 0x0003
+RAR3_FILE_ENCRYPTED = 0x0004
+RAR3_FILE_LARGE = 0x0100
+RAR3_FILE_SALT = 0x0400
+RAR3_LONG_BLOCK = 0x8000
+# RAR3的存储（不压缩）方法
+RAR3_METHOD_STORE = 0x30
+# RAR3密钥派生的迭代次数
+RAR3_ROUNDS = 0x40000
+
+
+# %% RAR5的密钥运算
+def read_vint(data: bytes, pos: int) -> (int, int):
+    """
+    读取RAR5的变长整数，每字节低7位有效，最高位表示后面还有字节\n
+    :param data: 字节串
+    :param pos: 起始位置
+    :return: (整数, 读完后的位置)
+    """
+    result = shift = 0
+    while pos < len(data):
+        byte = data[pos]
+        pos = pos + 1
+        result = result | ((byte & 0x7F) << shift)
+        shift = shift + 7
+        if not byte & 0x80:
+            break
+    return result, pos
+
+
+def rar5_password_check(password: str, salt: bytes, kdf_count: int) -> bytes:
+    """
+    计算RAR5的8字节密码校验值：PBKDF2-HMAC-SHA256迭代2^kdf_count+32次，再把32字节折叠成8字节\n
+    :param password: 密码字符串
+    :param salt: 16字节盐
+    :param kdf_count: 迭代次数的以2为底的对数
+    :return: 8字节密码校验值
+    """
+    value = pbkdf2_hmac("sha256", password.encode("utf8"), salt, (1 << kdf_count) + 32)
+    result = bytearray(RAR5_CHECK_SIZE)
+    for i, byte in enumerate(value):
+        result[i % RAR5_CHECK_SIZE] = result[i % RAR5_CHECK_SIZE] ^ byte
+    return bytes(result)
+
+
+# %% RAR3的密钥运算
+def rar3_key(password: str, salt: bytes) -> (bytes, bytes):
+    """
+    计算RAR3的AES-128密钥和初始向量：对UTF-16LE密码加盐再加3字节计数器做2^18轮SHA1\n
+    :param password: 密码字符串
+    :param salt: 8字节盐
+    :return: (16字节密钥, 16字节初始向量)
+    """
+    raw = password.encode("utf-16-le") + salt
+    context = sha1()
+    iv = bytearray(BLOCK_SIZE)
+    for i in range(RAR3_ROUNDS):
+        context.update(raw + i.to_bytes(3, "little"))
+        if i % (RAR3_ROUNDS // BLOCK_SIZE) == 0:
+            iv[i // (RAR3_ROUNDS // BLOCK_SIZE)] = context.copy().digest()[19]
+    digest = context.digest()
+    # 摘要按大端32位整数解释，密钥取每个整数的小端字节
+    key = b"".join(digest[i:i + 4][::-1] for i in range(0, BLOCK_SIZE, 4))
+    return key, bytes(iv)
+
+
+# %% 不依赖UnRAR动态库校验rar密码
+class RarVerifier(object):
+    """
+    rar密码校验器，只解析文件头，不需要UnRAR动态库\n
+    RAR5：有密码校验值时只比对校验值；加密了文件头但没有校验值时，解密第一个被加密的块头并比对CRC\n
+    RAR3：加密了文件头时解密第一个被加密的块头并比对CRC；只加密了数据时，解密最小的存储方式成员并比对CRC\n
+    其余情况native为False，需要回退到UnRAR动态库
+    """
+
+    def __init__(self, rarfile_path: str):
+        """
+        构造方法，解析文件头\n
+        :param rarfile_path: 压缩文件路径字符串
+        """
+        self.rarfile_path = rarfile_path
+        # 校验方式：rar5_check、rar5_header、rar3_header、rar3_store，None表示无法原生校验
+        self.method = None
+        self.salt = b""
+        self.kdf_count = 0
+        self.check = b""
+        self.iv = b""
+        self.data = b""
+        self.crc = 0
+        self.size = 0
+        # 加密块头在文件中的起始位置，以及第一个分组之后按需读取的密文
+        self.offset = 0
+        self.more = b""
+        # 无法原生校验时由进程内复用的UnRAR动态库对象和校验代价最小的成员
+        self.unrar_file = None
+        self.unrar_target = None
+        with open(rarfile_path, "rb") as f:
+            signature = f.read(len(RAR5_SIGNATURE))
+            if signature == RAR5_SIGNATURE:
+                self.parse_rar5(f)
+            elif signature[:len(RAR3_SIGNATURE)] == RAR3_SIGNATURE:
+                f.seek(len(RAR3_SIGNATURE))
+                self.parse_rar3(f)
+
+    @property
+    def native(self) -> bool:
+        """
+        是否能够不借助UnRAR动态库校验密码\n
+        :return: 是否能原生校验
+        """
+        return self.method is not None
+
+    def parse_rar5(self, f):
+        """
+        解析RAR5文件头，找到加密头或第一个带密码校验值的文件加密记录\n
+        :param f: 二进制文件对象，位置在签名之后
+        :return:
+        """
+        while True:
+            start = f.tell()
+            prefix = f.read(4 + 3)
+            if len(prefix) < 5:
+                return
+            size, pos = read_vint(prefix, 4)
+            header_end = start + pos + size
+            f.seek(start + pos)
+            header = f.read(size)
+            if len(header) < size:
+                return
+            header_type, pos = read_vint(header, 0)
+            flags, pos = read_vint(header, pos)
+            extra_size = data_size = 0
+            if flags & 0x0001:
+                extra_size, pos = read_vint(header, pos)
+            if flags & 0x0002:
+                data_size, pos = read_vint(header, pos)
+            if header_type == RAR5_HEAD_CRYPT:
+                # 其后的全部块头都被加密，每个块头前面是16字节初始向量
+                _, pos = read_vint(header, pos)
+                crypt_flags, pos = read_vint(header, pos)
+                self.kdf_count = header[pos]
+                self.salt = header[pos + 1:pos + 17]
+                self.check = header[pos + 17:pos + 17 + RAR5_CHECK_SIZE + RAR5_CHECKSUM_SIZE]
+                if crypt_flags & 0x0001 and self.is_valid_rar5_check():
+                    self.method = "rar5_check"
+                else:
+                    self.offset = header_end
+                    self.iv = f.read(BLOCK_SIZE)
+                    self.data = f.read(BLOCK_SIZE)
+                    self.method = "rar5_header"
+                return
+            if header_type == RAR5_HEAD_FILE and extra_size:
+                record = self.find_rar5_crypt_record(header[size - extra_size:])
+                if record is not None:
+                    crypt_flags, pos = record
+                    self.kdf_count = header[size - extra_size + pos]
+                    pos = size - extra_size + pos + 1
+                    self.salt = header[pos:pos + 16]
+                    self.check = header[pos + 32:pos + 32 + RAR5_CHECK_SIZE + RAR5_CHECKSUM_SIZE]
+                    if crypt_flags & 0x0001 and self.is_valid_rar5_check():
+                        self.method = "rar5_check"
+                        return
+            if header_type == RAR5_HEAD_END:
+                return
+            f.seek(header_end + data_size)
+
+    @staticmethod
+    def find_rar5_crypt_record(extra: bytes) -> (int, int):
+        """
+        在文件头的额外区域中查找文件加密记录\n
+        :param extra: 额外区域字节串
+        :return: (加密标志, KDF次数字节在额外区域中的位置)；找不到则返回None
+        """
+        pos = 0
+        while pos < len(extra):
+            record_size, pos = read_vint(extra, pos)
+            end = pos + record_size
+            record_type, record_pos = read_vint(extra, pos)
+            if record_type == RAR5_EXTRA_CRYPT:
+                _, record_pos = read_vint(extra, record_pos)
+                crypt_flags, record_pos = read_vint(extra, record_pos)
+                return crypt_flags, record_pos
+            pos = end
+        return None
+
+    def is_valid_rar5_check(self) -> bool:
+        """
+        校验值后4字节是前8字节SHA256的前4字节，用来判断校验值本身有没有损坏\n
+        :return: 校验值是否可用
+        """
+        check, checksum = self.check[:RAR5_CHECK_SIZE], self.check[RAR5_CHECK_SIZE:]
+        return len(checksum) == RAR5_CHECKSUM_SIZE and sha256(check).digest()[:RAR5_CHECKSUM_SIZE] == checksum
+
+    def parse_rar3(self, f):
+        """
+        解析RAR3文件头，找到加密的块头或最小的加密存储方式成员\n
+        :param f: 二进制文件对象，位置在签名之后
+        :return:
+        """
+        while True:
+            start = f.tell()
+            base = f.read(7)
+            if len(base) < 7:
+                return
+            _, header_type, flags, size = unpack("<HBHH", base)
+            if size < 7:
+                return
+            body = f.read(size - 7)
+            add_size = unpack("<I", body[:4])[0] if flags & RAR3_LONG_BLOCK and len(body) >= 4 else 0
+            if header_type == RAR3_HEAD_MAIN and flags & RAR3_MAIN_PASSWORD:
+                # 其后的全部块头都被加密，每个块头前面是8字节盐
+                self.offset = f.tell()
+                self.salt = f.read(8)
+                self.data = f.read(BLOCK_SIZE)
+                self.method = "rar3_header"
+                return
+            # 记下最小的加密存储方式成员，解析完全部文件头后再读它的数据
+            if header_type == RAR3_HEAD_FILE and self.is_rar3_stored_target(flags, body):
+                if self.method is None or add_size < len(self.data):
+                    name_size = unpack("<H", body[19:21])[0]
+                    name_end = 25 + name_size
+                    self.salt = body[name_end:name_end + 8]
+                    self.crc = unpack("<I", body[9:13])[0]
+                    self.size = unpack("<I", body[4:8])[0]
+                    self.offset = start + size
+                    self.data = b"\0" * add_size
+                    self.method = "rar3_store"
+            if header_type == RAR3_HEAD_END:
+                break
+            f.seek(start + size + add_size)
+        if self.method == "rar3_store":
+            f.seek(self.offset)
+            self.data = f.read(len(self.data))
+
+    @staticmethod
+    def is_rar3_stored_target(flags: int, body: bytes) -> bool:
+        """
+        判断RAR3文件头描述的成员能否用来校验：加密、带盐、不分卷、存储方式\n
+        :param flags: 块标志
+        :param body: 块头中基本字段之后的部分
+        :return: 能否用来校验
+        """
+        return (
+            flags & RAR3_FILE_ENCRYPTED and flags & RAR3_FILE_SALT and not flags & RAR3_FILE_SPLIT
+            and not flags & RAR3_FILE_LARGE and len(body) >= 25 and body[18] == RAR3_METHOD_STORE
+        )
+
+    def verify(self, password: str) -> bool:
+        """
+        校验密码\n
+        :param password: 密码字符串
+        :return: 密码是否正确
+        """
+        if self.method == "rar5_check":
+            return rar5_password_check(password, self.salt, self.kdf_count) == self.check[:RAR5_CHECK_SIZE]
+        if self.method == "rar5_header":
+            key = pbkdf2_hmac("sha256", password.encode("utf8"), self.salt, 1 << self.kdf_count)
+            return self.verify_rar5_header(AesDecryptor(key))
+        if self.method == "rar3_header":
+            key, iv = rar3_key(password, self.salt)
+            return self.verify_rar3_header(AesDecryptor(key), iv)
+        if self.method == "rar3_store":
+            key, iv = rar3_key(password, self.salt)
+            plain = AesDecryptor(key).decrypt_cbc(self.data, iv)
+            return crc32(plain[:self.size]) == self.crc
+        return False
+
+    def verify_rar5_header(self, decryptor: AesDecryptor) -> bool:
+        """
+        解密RAR5第一个被加密的块头并比对CRC32\n
+        :param decryptor: AES解密器
+        :return: 是否通过
+        """
+        plain = decryptor.decrypt_cbc(self.data, self.iv)
+        size, pos = read_vint(plain, 4)
+        total = pos + size
+        if size == 0 or total > 4 + 3 + (1 << 21):
+            return False
+        data = self.read_more(BLOCK_SIZE + len(self.iv), total)
+        plain = plain + decryptor.decrypt_cbc(data, self.data[-BLOCK_SIZE:])
+        return crc32(plain[4:total]) == unpack("<I", plain[:4])[0]
+
+    def verify_rar3_header(self, decryptor: AesDecryptor, iv: bytes) -> bool:
+        """
+        解密RAR3第一个被加密的块头并比对CRC32的低16位\n
+        :param decryptor: AES解密器
+        :param iv: 初始向量
+        :return: 是否通过
+        """
+        plain = decryptor.decrypt_cbc(self.data, iv)
+        crc, _, _, size = unpack("<HBHH", plain[:7])
+        if size < 7:
+            return False
+        data = self.read_more(BLOCK_SIZE + len(self.salt), size)
+        plain = plain + decryptor.decrypt_cbc(data, self.data[-BLOCK_SIZE:])
+        return crc32(plain[2:size]) & 0xFFFF == crc
+
+    def open_unrar(self):
+        """
+        打开UnRAR动态库的RarFile对象并缓存，同一个进程只打开、解析一次\n
+        :return: RarFile对象，没有UnRAR动态库则返回None
+        """
+        if self.unrar_file is None and RarFile is not None:
+            self.unrar_file = RarFile(self.rarfile_path)
+            self.unrar_target = select_rar_target(self.unrar_file)
+        return self.unrar_file
+
+    def close(self):
+        """
+        释放缓存的RarFile对象\n
+        :return:
+        """
+        self.unrar_file = self.unrar_target = None
+
+    def read_more(self, skip: int, total: int) -> bytes:
+        """
+        块头超过一个分组时，按需读取第一个分组之后的密文并缓存\n
+        :param skip: 第一个分组在加密区域中的结束位置
+        :param total: 块头明文的总长度
+        :return: 第一个分组之后的密文
+        """
+        need = (total + BLOCK_SIZE - 1) // BLOCK_SIZE * BLOCK_SIZE - BLOCK_SIZE
+        if need <= 0:
+            return b""
+        if len(self.more) < need:
+            with open(self.rarfile_path, "rb") as f:
+                f.seek(self.offset + skip)
+                self.more = f.read(need)
+        return self.more[:need]
+
+
+def select_rar_target(file: RarFile):
+    """
+    从UnRAR动态库列出的成员中挑出校验代价最小的一个，即压缩后最小的非空成员\n
+    :param file: 已经打开的RarFile对象
+    :return: 校验代价最小的成员信息，没有成员则返回None
+    """
+    infos = [info for info in file.infolist() if not info.filename.endswith(("/", "\\"))]
+    infos = [info for info in infos if info.file_size > 0] or infos
+    if not infos:
+        return None
+    return min(infos, key=lambda info: info.compress_size)
+
+
+def extract_rar_file(rarfile_path: str, extract_path: str, password: str):
+    """
+    确认密码正确后，把全部成员解压到磁盘，需要UnRAR动态库\n
+    :param rarfile_path: 压缩文件路径字符串
+    :param extract_path: 解压路径字符串
+    :param password: 密码字符串
+    :return:
+    """
+    if RarFile is None:
+        log.warning("找不到UnRAR动态库，无法解压rar文件，请用找到的密码手动解压")
+        return
+    with RarFile(rarfile_path) as file:
+        file.extractall(path=extract_path, members=None, pwd=password)
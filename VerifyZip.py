@@ -0,0 +1,224 @@
+# %% 导入包
+from zipfile import ZipFile, ZipInfo, ZipExtFile, BadZipFile, sizeFileHeader, ZIP_STORED
+from zlib import error
+from struct import unpack
+from io import BytesIO
+from hashlib import pbkdf2_hmac, sha1
+from hmac import new as new_hmac, compare_digest
+from ZipCrypto import init_keys, check_header, search_range, search_range_numpy, is_numpy_supported, HEADER_SIZE
+from KeySpace import KeySpace
+from EventLog import EventLog
+try:
+    from pyzipper import AESZipFile
+except ImportError:
+    AESZipFile = None
+
+
+# %% 声明全局变量
+log = EventLog("VerifyZip")
+# 校验时每次读取的字节数，读出的数据直接丢弃
+BUFFER_SIZE = 1 << 20
+# WinZip AES加密的压缩方法编号
+AES_COMPRESS_TYPE = 99
+# WinZip AES加密的额外字段编号
+AES_EXTRA_ID = 0x9901
+# WinZip AES加密强度对应的密钥长度，1、2、3分别为AES-128、AES-192、AES-256
+AES_KEY_SIZES = {1: 16, 2: 24, 3: 32}
+# WinZip AES的密钥派生迭代次数、密码校验值长度、认证码长度
+AES_ITERATIONS = 1000
+AES_VERIFIER_SIZE = 2
+AES_MAC_SIZE = 10
+
+
+# %% 读取成员信息
+def read_encryption_header(file: ZipFile, info: ZipInfo, size: int = HEADER_SIZE) -> bytes:
+    """
+    读取成员数据区最前面的若干字节，默认只读ZipCrypto加密头\n
+    :param file: 已经打开的ZipFile对象
+    :param info: 成员信息
+    :param size: 要读取的字节数
+    :return: 字节串
+    """
+    file.fp.seek(info.header_offset)
+    local_header = file.fp.read(sizeFileHeader)
+    name_length, extra_length = unpack("<HH", local_header[26:30])
+    file.fp.seek(info.header_offset + sizeFileHeader + name_length + extra_length)
+    return file.fp.read(size)
+
+
+def get_check_byte(info: ZipInfo) -> int:
+    """
+    计算ZipCrypto加密头的校验字节：设置了数据描述符标志时用修改时间的高字节，否则用CRC的最高字节\n
+    :param info: 成员信息
+    :return: 校验字节
+    """
+    if info.flag_bits & 0x8:
+        return (info._raw_time >> 8) & 0xFF
+    return (info.CRC >> 24) & 0xFF
+
+
+def select_zip_target(infos: [ZipInfo]) -> ZipInfo:
+    """
+    从成员中挑出校验代价最小的一个：压缩后最小，一样大时优先选存储方式\n
+    :param infos: 候选成员
+    :return: 校验代价最小的成员，没有候选成员则返回None
+    """
+    infos = [info for info in infos if not info.is_dir()]
+    # 空文件的CRC恒为0，起不到校验作用，尽量不选
+    infos = [info for info in infos if info.file_size > 0] or infos
+    if not infos:
+        return None
+    return min(infos, key=lambda info: (info.compress_size, info.compress_type != ZIP_STORED))
+
+
+def get_aes_strength(info: ZipInfo) -> int:
+    """
+    从额外字段0x9901中读取WinZip AES加密强度\n
+    :param info: 成员信息
+    :return: 加密强度，1、2、3分别为AES-128、AES-192、AES-256；不是AES加密则返回None
+    """
+    extra = info.extra
+    while len(extra) >= 4:
+        extra_id, extra_length = unpack("<HH", extra[:4])
+        if extra_id == AES_EXTRA_ID and extra_length >= 7:
+            return extra[8]
+        extra = extra[4 + extra_length:]
+    return None
+
+
+def extract_zip_file(file: ZipFile, extract_path: str, password: bytes):
+    """
+    确认密码正确后，把全部成员解压到磁盘；AES加密的zip需要安装pyzipper\n
+    :param file: 已经打开的ZipFile对象
+    :param extract_path: 解压路径字符串
+    :param password: 密码字节串
+    :return:
+    """
+    if not any(info.compress_type == AES_COMPRESS_TYPE for info in file.infolist()):
+        file.extractall(path=extract_path, members=None, pwd=password)
+    elif AESZipFile is None:
+        log.warning("未安装pyzipper，无法解压AES加密的zip文件，请用找到的密码手动解压")
+    else:
+        with AESZipFile(file.filename) as aes_file:
+            aes_file.extractall(path=extract_path, members=None, pwd=password)
+
+
+# %% 分阶段校验zip密码
+class ZipVerifier(object):
+    """
+    分阶段的zip密码校验器\n
+    第一阶段用一个成员的ZipCrypto加密头校验字节排除错误密码，第二阶段用其余加密成员的加密头继续排除，
+    只有全部通过的密码才进入第三阶段，在内存中解压校验代价最小的那个成员并校验CRC\n
+    WinZip AES加密的成员先用2字节密码校验值排除错误密码，再对最小的成员计算HMAC-SHA1认证码确认
+    """
+
+    def __init__(self, file: ZipFile):
+        """
+        构造方法，预先读出全部ZipCrypto加密成员的加密头\n
+        :param file: 已经打开的ZipFile对象
+        """
+        self.file = file
+        self.headers = []
+        encrypted = [info for info in file.infolist() if info.flag_bits & 0x1]
+        zip_crypto = [info for info in encrypted if info.compress_type != AES_COMPRESS_TYPE]
+        for info in zip_crypto:
+            self.headers.append((read_encryption_header(file, info), get_check_byte(info)))
+        # 第三阶段和AES认证码都只针对校验代价最小的成员，它的密文预先读进内存，之后不再读磁盘
+        self.target = select_zip_target(zip_crypto)
+        if self.target is not None:
+            self.target_data = BytesIO(read_encryption_header(file, self.target, self.target.compress_size))
+        self.aes_target = select_zip_target([info for info in encrypted if info.compress_type == AES_COMPRESS_TYPE])
+        # AES加密成员只需要最小的那个：盐、密码校验值、密文和认证码
+        if self.aes_target is not None:
+            key_size = AES_KEY_SIZES[get_aes_strength(self.aes_target)]
+            salt_size = key_size // 2
+            data = read_encryption_header(file, self.aes_target, self.aes_target.compress_size)
+            self.aes_key_size = key_size
+            self.aes_salt = data[:salt_size]
+            self.aes_verifier = data[salt_size:salt_size + AES_VERIFIER_SIZE]
+            self.aes_data = data[salt_size + AES_VERIFIER_SIZE:-AES_MAC_SIZE]
+            self.aes_mac = data[-AES_MAC_SIZE:]
+
+    @classmethod
+    def from_path(cls, zipfile_path: str):
+        """
+        打开并解析压缩文件，返回的校验器可以在整个进程内复用\n
+        :param zipfile_path: 压缩文件路径字符串
+        :return: ZipVerifier对象，用完需要调用close
+        """
+        return cls(ZipFile(zipfile_path))
+
+    def close(self):
+        """
+        关闭压缩文件\n
+        :return:
+        """
+        self.file.close()
+
+    def check_headers(self, password: bytes) -> bool:
+        """
+        第一、二阶段：依次用每个加密成员的加密头校验\n
+        :param password: 密码字节串
+        :return: 是否全部通过
+        """
+        if not self.headers:
+            return True
+        keys = init_keys(password)
+        for header, check_byte in self.headers:
+            if not check_header(keys, header, check_byte):
+                return False
+        return True
+
+    def search_range(self, keyspace: KeySpace, start: int, end: int) -> [bytes]:
+        """
+        枚举[start, end)区间的密码，只有ZipCrypto加密时先排除过不了加密头校验的密码：
+        安装了NumPy时整个区间批量校验，否则复用前缀密钥状态逐个校验\n
+        :param keyspace: 密码空间
+        :param start: 起始序号
+        :param end: 结束序号（不含）
+        :return: 枚举密码字节串的生成器
+        """
+        if self.headers and self.aes_target is None and is_numpy_supported(keyspace):
+            return search_range_numpy(keyspace, start, end, self.headers)
+        if self.headers and self.aes_target is None:
+            return search_range(keyspace, start, end, self.headers)
+        return keyspace.iterate_bytes(start, end)
+
+    def check_aes(self, password: bytes) -> bool:
+        """
+        校验WinZip AES加密：先比对密码校验值，通过后再比对认证码，全程不解密\n
+        :param password: 密码字节串
+        :return: 是否通过
+        """
+        if self.aes_target is None:
+            return True
+        key = pbkdf2_hmac("sha1", password, self.aes_salt, AES_ITERATIONS, self.aes_key_size * 2 + AES_VERIFIER_SIZE)
+        if key[-AES_VERIFIER_SIZE:] != self.aes_verifier:
+            return False
+        mac = new_hmac(key[self.aes_key_size:-AES_VERIFIER_SIZE], self.aes_data, sha1).digest()
+        return compare_digest(mac[:AES_MAC_SIZE], self.aes_mac)
+
+    def verify(self, password: bytes) -> bool:
+        """
+        校验密码\n
+        :param password: 密码字节串
+        :return: 密码是否正确
+        """
+        if not self.check_headers(password):
+            return False
+        if not self.check_aes(password):
+            return False
+        if self.target is None:
+            return True
+        # 加密成员不可能用空密码解开
+        if not password:
+            return False
+        self.target_data.seek(0)
+        try:
+            with ZipExtFile(self.target_data, "r", self.target, password) as f:
+                # 读到末尾时ZipExtFile会自动比对CRC，不一致则抛出BadZipFile
+                while f.read(BUFFER_SIZE):
+                    pass
+        except (RuntimeError, BadZipFile, error):
+            return False
+        return True
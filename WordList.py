@@ -0,0 +1,295 @@
+# %% 导入包
+from struct import Struct
+from mmap import mmap, ACCESS_READ
+from bisect import bisect_right
+from tempfile import TemporaryFile
+from shutil import copyfileobj
+from os import path
+
+
+# %% 声明全局变量
+# 紧凑字典文件的扩展名，导出时按扩展名决定格式
+WORDLIST_SUFFIX = ".zcwl"
+# 文件头：魔数、版本、桶数量、密码总数
+MAGIC = b"ZCWL"
+VERSION = 1
+HEADER_STRUCT = Struct("<4sHHQ")
+# 每个桶的描述：密码字节长度、密码数量、数据在文件里的偏移
+BUCKET_STRUCT = Struct("<IQQ")
+
+
+# %% 判断文件格式
+def is_wordlist(file_path: str) -> bool:
+    """
+    根据魔数判断是不是紧凑字典文件\n
+    :param file_path: 文件路径字符串
+    :return: 是否为紧凑字典文件
+    """
+    with open(file_path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+# %% 定义一个类，随机访问紧凑字典
+class WordList(object):
+    """
+    紧凑字典类，接口与KeySpace相同，把字典看成一个按序号排列的数组\n
+    文件由文件头、桶描述表和各个桶的数据组成：同一个桶里的密码字节长度相同，去重后首尾相接存放，没有分隔符，
+    所以第N个密码的位置可以直接算出来，不必从头扫描，也不必逐行解码、去空白
+    """
+
+    def __init__(self, file_path: str):
+        """
+        构造方法，映射文件并读取桶描述表\n
+        :param file_path: 紧凑字典文件路径字符串
+        """
+        self.file_path = file_path
+        with open(file_path, "rb") as f:
+            self.view = mmap(f.fileno(), 0, access=ACCESS_READ)
+        magic, version, bucket_count, self.size = HEADER_STRUCT.unpack_from(self.view, 0)
+        if magic != MAGIC or version != VERSION:
+            self.view.close()
+            raise ValueError("%s 不是紧凑字典文件或版本不支持" % file_path)
+        # buckets[i]为(密码字节长度, 密码数量, 数据偏移)，starts[i]为第i个桶第一个密码的序号
+        self.buckets = []
+        self.starts = []
+        start = 0
+        for i in range(bucket_count):
+            bucket = BUCKET_STRUCT.unpack_from(self.view, HEADER_STRUCT.size + i * BUCKET_STRUCT.size)
+            self.buckets.append(bucket)
+            self.starts.append(start)
+            start = start + bucket[1]
+
+    def __len__(self) -> int:
+        """
+        密码总数\n
+        :return: 密码总数
+        """
+        return self.size
+
+    def __getitem__(self, index: int) -> str:
+        """
+        根据序号取密码\n
+        :param index: 密码序号，从0开始
+        :return: 密码字符串
+        """
+        return self.get_bytes(index).decode("utf8", "replace")
+
+    def __getstate__(self) -> dict:
+        """
+        序列化时只传文件路径，子进程重新映射\n
+        :return: 状态字典
+        """
+        return {"file_path": self.file_path}
+
+    def __setstate__(self, state: dict):
+        """
+        反序列化，重新映射文件\n
+        :param state: 状态字典
+        :return:
+        """
+        self.__init__(state["file_path"])
+
+    def locate(self, index: int) -> (int, int):
+        """
+        计算序号落在哪个桶里\n
+        :param index: 密码序号
+        :return: (桶的下标, 在桶内的偏移)
+        """
+        if not 0 <= index < self.size:
+            raise IndexError("序号 %d 超出范围" % index)
+        i = bisect_right(self.starts, index) - 1
+        # 空桶与下一个桶的起始序号相同，跳过
+        while self.buckets[i][1] == 0:
+            i = i + 1
+        return i, index - self.starts[i]
+
+    def get_bytes(self, index: int) -> bytes:
+        """
+        根据序号取密码的字节串\n
+        :param index: 密码序号，从0开始
+        :return: 密码字节串
+        """
+        i, offset = self.locate(index)
+        length, _, data_offset = self.buckets[i]
+        position = data_offset + offset * length
+        return self.view[position:position + length]
+
+    def iterate_bytes(self, start: int, end: int) -> [bytes]:
+        """
+        取出序号在[start, end)之间的密码字节串，每个桶只切一次片\n
+        :param start: 起始序号
+        :param end: 结束序号（不含）
+        :return: 密码字节串组成的列表
+        """
+        end = min(end, self.size)
+        result = []
+        while start < end:
+            i, offset = self.locate(start)
+            length, count, data_offset = self.buckets[i]
+            number = min(count - offset, end - start)
+            position = data_offset + offset * length
+            data = self.view[position:position + number * length]
+            result.extend(data[j:j + length] for j in range(0, len(data), length))
+            start = start + number
+        return result
+
+    def iterate(self, start: int, end: int) -> [str]:
+        """
+        取出序号在[start, end)之间的密码字符串\n
+        :param start: 起始序号
+        :param end: 结束序号（不含）
+        :return: 密码字符串组成的列表
+        """
+        return [password.decode("utf8", "replace") for password in self.iterate_bytes(start, end)]
+
+    def split(self, batch_size: int, start: int = 0, end: int = None) -> [range]:
+        """
+        把字典的[start, end)部分切成若干区间\n
+        :param batch_size: 每个区间的密码数量
+        :param start: 起始序号，默认从头开始
+        :param end: 结束序号（不含），默认到字典末尾
+        :return: 由range对象组成的生成器
+        """
+        end = self.size if end is None else min(end, self.size)
+        for batch_start in range(start, end, batch_size):
+            yield range(batch_start, min(batch_start + batch_size, end))
+
+    def stats(self) -> [(int, int)]:
+        """
+        每种字节长度的密码数量\n
+        :return: 由(密码字节长度, 密码数量)组成的列表
+        """
+        return [(length, count) for length, count, _ in self.buckets]
+
+    def close(self):
+        """
+        解除映射\n
+        :return:
+        """
+        self.view.close()
+
+
+# %% 定义一个类，写入紧凑字典
+class WordListWriter(object):
+    """
+    紧凑字典的写入类：密码按字节长度先写进各自的临时文件，关闭时再拼成一个文件；
+    需要去重时每个桶用一个集合记录已经写过的密码，内存占用与去重后的字典大小相当
+    """
+
+    def __init__(self, file_path: str, dedupe: bool = True):
+        """
+        构造方法\n
+        :param file_path: 紧凑字典文件路径字符串
+        :param dedupe: 是否去重，写入的密码本来就不重复时关掉可以省内存
+        """
+        self.file_path = file_path
+        self.dedupe = dedupe
+        # 临时文件放在目标文件旁边，避免系统临时目录放不下
+        self.temp_dir = path.dirname(path.abspath(file_path))
+        # 密码字节长度到(临时文件, 密码数量, 已写过的密码集合)的映射
+        self.buckets = {}
+
+    def __enter__(self):
+        """
+        进入with语句\n
+        :return: 自身
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        退出with语句，没有异常时写出文件\n
+        :return:
+        """
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def bucket(self, length: int) -> list:
+        """
+        取出某个字节长度的桶，没有就新建\n
+        :param length: 密码字节长度
+        :return: [临时文件, 密码数量, 已写过的密码集合]
+        """
+        if length not in self.buckets:
+            self.buckets[length] = [TemporaryFile(dir=self.temp_dir), 0, set() if self.dedupe else None]
+        return self.buckets[length]
+
+    def add(self, password: bytes):
+        """
+        写入一个密码，空密码跳过\n
+        :param password: 密码字节串
+        :return:
+        """
+        if len(password) == 0:
+            return
+        bucket = self.bucket(len(password))
+        if bucket[2] is not None:
+            if password in bucket[2]:
+                return
+            bucket[2].add(password)
+        bucket[0].write(password)
+        bucket[1] = bucket[1] + 1
+
+    def add_packed(self, length: int, data: bytes):
+        """
+        写入一串首尾相接、长度都是length的密码，调用者保证它们互不重复，不再去重\n
+        :param length: 每个密码的字节长度
+        :param data: 密码首尾相接的字节串
+        :return:
+        """
+        if length == 0 or len(data) == 0:
+            return
+        bucket = self.bucket(length)
+        bucket[0].write(data)
+        bucket[1] = bucket[1] + len(data) // length
+
+    def close(self) -> int:
+        """
+        按字节长度从小到大拼出最终文件\n
+        :return: 去重后的密码总数
+        """
+        lengths = sorted(self.buckets)
+        total = sum(self.buckets[length][1] for length in lengths)
+        data_offset = HEADER_STRUCT.size + len(lengths) * BUCKET_STRUCT.size
+        with open(self.file_path, "wb") as f:
+            f.write(HEADER_STRUCT.pack(MAGIC, VERSION, len(lengths), total))
+            for length in lengths:
+                count = self.buckets[length][1]
+                f.write(BUCKET_STRUCT.pack(length, count, data_offset))
+                data_offset = data_offset + length * count
+            for length in lengths:
+                temp = self.buckets[length][0]
+                temp.seek(0)
+                copyfileobj(temp, f)
+        self.discard()
+        return total
+
+    def discard(self):
+        """
+        关闭并删除临时文件\n
+        :return:
+        """
+        for bucket in self.buckets.values():
+            bucket[0].close()
+        self.buckets.clear()
+
+
+# %% 把文本字典转换成紧凑字典
+def convert_text(text_path: str, wordlist_path: str) -> int:
+    """
+    把每行一个密码的文本字典转换成紧凑字典，去掉每行首尾的空白并去重\n
+    :param text_path: 文本字典路径字符串
+    :param wordlist_path: 紧凑字典路径字符串
+    :return: 去重后的密码总数
+    """
+    writer = WordListWriter(wordlist_path)
+    try:
+        with open(text_path, "rb") as f:
+            for line in f:
+                writer.add(line.strip())
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.close()
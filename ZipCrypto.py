@@ -0,0 +1,222 @@
+# %% 导入包
+from KeySpace import KeySpace
+
+
+# %% 生成CRC32查找表
+def _make_crc_table() -> (int, ):
+    """
+    生成CRC32查找表，多项式和zlib一致\n
+    :return: 256个整数组成的元组
+    """
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xEDB88320 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+# %% 声明全局变量
+# CRC32查找表
+CRC_TABLE = _make_crc_table()
+# NumPy是可选依赖，导入要上百毫秒，第一次批量校验时才由load_numpy导入
+numpy = None
+numpy_loaded = False
+# NumPy版本的CRC32查找表
+CRC_TABLE_ARRAY = None
+# 传统PKWARE加密的初始密钥
+INITIAL_KEYS = (0x12345678, 0x23456789, 0x34567890)
+# 传统PKWARE加密头的长度
+HEADER_SIZE = 12
+
+
+# %% 传统PKWARE加密（ZipCrypto）的密钥运算
+def init_keys(password: bytes, keys: (int, int, int) = INITIAL_KEYS) -> (int, int, int):
+    """
+    用密码初始化三个密钥，每个字节的密钥更新直接写在循环里，不调用函数，check_header等热点函数也一样\n
+    :param password: 密码字节串
+    :param keys: 起始密钥，默认为初始密钥；传入某个前缀的密钥时只需计算剩余部分
+    :return: 三个密钥组成的元组
+    """
+    key0, key1, key2 = keys
+    for byte in password:
+        key0 = (key0 >> 8) ^ CRC_TABLE[(key0 ^ byte) & 0xFF]
+        key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        key2 = (key2 >> 8) ^ CRC_TABLE[(key2 ^ (key1 >> 24)) & 0xFF]
+    return key0, key1, key2
+
+
+def check_header(keys: (int, int, int), header: bytes, check_byte: int) -> bool:
+    """
+    解密12字节的加密头，比对最后一个字节，错误的密码大约有255/256在这一步被排除\n
+    :param keys: 用密码初始化后的三个密钥
+    :param header: 12字节加密头
+    :param check_byte: 校验字节，CRC的最高字节或修改时间的高字节
+    :return: 是否通过校验
+    """
+    key0, key1, key2 = keys
+    byte = 0
+    for cipher in header:
+        temp = key2 | 2
+        byte = cipher ^ (((temp * (temp ^ 1)) >> 8) & 0xFF)
+        key0 = (key0 >> 8) ^ CRC_TABLE[(key0 ^ byte) & 0xFF]
+        key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        key2 = (key2 >> 8) ^ CRC_TABLE[(key2 ^ (key1 >> 24)) & 0xFF]
+    return byte == check_byte
+
+
+# %% 复用前缀密钥状态的遍历
+def search_range(keyspace: KeySpace, start: int, end: int, headers: [(bytes, int)]) -> [bytes]:
+    """
+    按深度优先的顺序遍历[start, end)区间的密码，每一层缓存密码前缀对应的三个密钥，
+    换一个密码时只需从发生变化的那一位开始重新计算，大多数时候只计算最后一个字符\n
+    :param keyspace: 密码空间
+    :param start: 起始序号
+    :param end: 结束序号（不含）
+    :param headers: 由(加密头, 校验字节)组成的列表
+    :return: 通过全部加密头校验的密码字节串的生成器
+    """
+    end = min(end, len(keyspace))
+    seed_bytes = [char.encode("utf8") for char in keyspace.seed]
+    while start < end:
+        digit, offset = keyspace.locate(start)
+        count = min(end - start, len(keyspace.seed) ** digit - offset)
+        yield from _search_digit(keyspace, seed_bytes, digit, offset, count, headers)
+        start = start + count
+
+
+def _search_digit(
+        keyspace: KeySpace, seed_bytes: [bytes], digit: int, offset: int, count: int, headers: [(bytes, int)]
+) -> [bytes]:
+    """
+    在同一位数内部遍历count个密码\n
+    :param keyspace: 密码空间
+    :param seed_bytes: 种子中每个字符的字节串
+    :param digit: 位数
+    :param offset: 起始密码在该位数内部的偏移
+    :param count: 密码数量
+    :param headers: 由(加密头, 校验字节)组成的列表
+    :return: 通过全部加密头校验的密码字节串的生成器
+    """
+    base = len(seed_bytes)
+    indices = keyspace.to_digits(offset, digit)
+    # states[i]是前i个字符对应的密钥，states[0]是初始密钥
+    states = [INITIAL_KEYS] * (digit + 1)
+    changed = 0
+    for _ in range(count):
+        for i in range(changed, digit):
+            states[i + 1] = init_keys(seed_bytes[indices[i]], states[i])
+        keys = states[digit]
+        for header, check_byte in headers:
+            if not check_header(keys, header, check_byte):
+                break
+        else:
+            yield b"".join(seed_bytes[i] for i in indices)
+        # 像里程表一样进位，记下最高的变化位置
+        changed = digit - 1
+        while changed >= 0:
+            indices[changed] = indices[changed] + 1
+            if indices[changed] < base:
+                break
+            indices[changed] = 0
+            changed = changed - 1
+        if changed < 0:
+            return
+
+
+# %% 用NumPy批量计算加密头校验
+def load_numpy():
+    """
+    导入NumPy并生成NumPy版本的CRC32查找表，只有第一次调用时真正导入\n
+    :return: numpy模块，没有安装NumPy则返回None
+    """
+    global numpy, numpy_loaded, CRC_TABLE_ARRAY
+    if not numpy_loaded:
+        numpy_loaded = True
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+        if module is not None:
+            CRC_TABLE_ARRAY = module.array(CRC_TABLE, dtype=module.uint32)
+        numpy = module
+    return numpy
+
+
+def update_keys_array(keys: tuple, byte) -> tuple:
+    """
+    用一列明文字节批量更新三个密钥数组\n
+    :param keys: 三个uint32数组组成的元组
+    :param byte: uint8数组，每个密码对应一个字节
+    :return: 更新后的三个密钥数组
+    """
+    key0, key1, key2 = keys
+    key0 = (key0 >> numpy.uint32(8)) ^ CRC_TABLE_ARRAY[(key0 ^ byte) & numpy.uint32(0xFF)]
+    key1 = (key1 + (key0 & numpy.uint32(0xFF))) * numpy.uint32(134775813) + numpy.uint32(1)
+    key2 = (key2 >> numpy.uint32(8)) ^ CRC_TABLE_ARRAY[(key2 ^ (key1 >> numpy.uint32(24))) & numpy.uint32(0xFF)]
+    return key0, key1, key2
+
+
+def check_headers_batch(candidates, headers: [(bytes, int)]):
+    """
+    对一批等长密码批量校验全部加密头，uint32运算自然溢出，相当于与0xFFFFFFFF取与\n
+    :param candidates: 形状为(密码数量, 位数)的uint8二维数组
+    :param headers: 由(加密头, 校验字节)组成的列表
+    :return: 通过全部加密头校验的密码下标数组
+    """
+    count = candidates.shape[0]
+    keys = tuple(numpy.full(count, key, dtype=numpy.uint32) for key in INITIAL_KEYS)
+    for column in candidates.T:
+        keys = update_keys_array(keys, column)
+    survivors = numpy.arange(count)
+    for header, check_byte in headers:
+        header_keys = keys
+        byte = None
+        for cipher in header:
+            temp = header_keys[2] | numpy.uint32(2)
+            byte = numpy.uint32(cipher) ^ (((temp * (temp ^ numpy.uint32(1))) >> numpy.uint32(8)) & numpy.uint32(0xFF))
+            header_keys = update_keys_array(header_keys, byte)
+        passed = byte == check_byte
+        survivors = survivors[passed]
+        keys = tuple(key[passed] for key in keys)
+        if len(survivors) == 0:
+            break
+    return survivors
+
+
+def search_range_numpy(keyspace: KeySpace, start: int, end: int, headers: [(bytes, int)]) -> [bytes]:
+    """
+    用NumPy遍历[start, end)区间的密码：先按混合进制批量生成密码数组，再批量校验加密头\n
+    :param keyspace: 密码空间，种子必须全是单字节字符
+    :param start: 起始序号
+    :param end: 结束序号（不含）
+    :param headers: 由(加密头, 校验字节)组成的列表
+    :return: 通过全部加密头校验的密码字节串的生成器
+    """
+    end = min(end, len(keyspace))
+    base = len(keyspace.seed)
+    seed_array = numpy.frombuffer(keyspace.seed.encode("latin-1"), dtype=numpy.uint8)
+    while start < end:
+        digit, offset = keyspace.locate(start)
+        count = min(end - start, base ** digit - offset)
+        offsets = numpy.arange(offset, offset + count, dtype=numpy.uint64)
+        columns = []
+        for pos in range(digit - 1, -1, -1):
+            columns.append(seed_array[(offsets // numpy.uint64(base ** pos)) % numpy.uint64(base)])
+        candidates = numpy.stack(columns, axis=1) if columns else numpy.zeros((count, 0), dtype=numpy.uint8)
+        for i in check_headers_batch(candidates, headers):
+            yield candidates[i].tobytes()
+        start = start + count
+
+
+def is_numpy_supported(keyspace: KeySpace) -> bool:
+    """
+    判断能否用NumPy遍历这个密码空间：需要安装NumPy，种子全是单字节字符，序号不超过uint64\n
+    :param keyspace: 密码空间
+    :return: 能否使用NumPy
+    """
+    if load_numpy() is None or not keyspace.digit_range:
+        return False
+    return all(ord(char) < 128 for char in keyspace.seed) and len(keyspace.seed) ** max(keyspace.digit_range) < 1 << 63
+
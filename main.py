@@ -1,16 +1,20 @@
 # %% 导入包
 import AddEnvironVar
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtGui import QPalette, QColor, QFont
-from PyQt5.QtCore import Qt
 from sys import argv, exit
 from multiprocessing import freeze_support
-from UI.ModernMainWindow import ModernMainWindow
+from EventLog import configure
 
 
 # %% 运行
 if __name__ == "__main__":
     freeze_support()
+    # spawn方式启动的消费者进程会重新导入本模块，PyQt5和界面只在主进程里导入
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtGui import QPalette, QColor, QFont
+    from PyQt5.QtCore import Qt
+    from UI.ModernMainWindow import ModernMainWindow
+    # 默认只记录警告，设置环境变量ZIPCRACKER_LOG=DEBUG或TRACE可以看到更多事件
+    configure()
     app = QApplication(argv)
     # 统一应用暗色主题与更大的默认字体
     app.setStyle("Fusion")